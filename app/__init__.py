@@ -0,0 +1,6 @@
+"""
+Repo2Context: turn repositories into LLM-ready context files.
+Library entry point is `CrawlClient`; see app/client.py.
+"""
+from .client import CrawlClient, CrawlOptions
+from .events import Status, Discovered, Fetched, Skipped, Failed, Progress, Done, Error
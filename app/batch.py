@@ -0,0 +1,220 @@
+"""
+Batch jobs: many repositories, one shared client.
+All repos in a batch run on one `CrawlClient` (one HTTP pool, browser,
+rate governor and fair scheduler), at most BATCH_CONCURRENCY at a time.
+Each repo writes its usual artifacts, and the batch writes a summary
+manifest `batch_<timestamp>.json` with per-repo timings and failures.
+
+Input is one repo per line, `<url or path> [ref] [path]` (blank lines and
+`#` comments are skipped), or a JSON list of such strings or
+{"repo", "ref", "path", "base"} objects:
+
+    python -m app.batch repos.txt --jobs 8 --format txt,jsonl
+    cat repos.txt | python -m app.batch -
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import secrets
+import argparse
+from dataclasses import dataclass, field, asdict, replace
+from .client import CrawlClient, CrawlOptions
+from .events import Done, Error
+from .sources import open_source, SourceError
+from .config import BATCH_CONCURRENCY, OUTPUT_DIR, OUTPUT_FORMATS
+
+@dataclass
+class BatchEntry:
+    repo: str
+    ref: str | None = None
+    path: str = ""
+    base: str | None = None
+    name: str | None = None  # output name override, set when two entries would collide
+    # Filled in as the job runs
+    status: str = "pending"  # pending, running, ok, partial (some files failed/omitted), failed
+    artifacts: list = field(default_factory=list)
+    files: int = 0
+    failed_files: list = field(default_factory=list)
+    omitted_files: int = 0
+    cached: bool = False
+    error: str = ""
+    queued: float = 0.0   # seconds spent waiting for a batch slot
+    elapsed: float = 0.0  # seconds spent crawling
+
+    @property
+    def tag(self) -> str:
+        return self.repo + (f"@{self.ref}" if self.ref else "") + (f":{self.path}" if self.path else "")
+
+def parse_batch(text: str) -> list:
+    """Batch entries from a JSON list or `<repo> [ref] [path]` lines."""
+    if text.lstrip().startswith("["):
+        entries = []
+        for item in json.loads(text):
+            if isinstance(item, str):
+                entries.append(BatchEntry(*item.split()[:3]))
+            else:
+                entries.append(BatchEntry(item["repo"], item.get("ref"), item.get("path", ""), item.get("base")))
+        return entries
+    entries = []
+    for line in text.splitlines():
+        fields = line.split("#", 1)[0].split()
+        if fields:
+            entries.append(BatchEntry(fields[0], *fields[1:3]))
+    return entries
+
+def assign_names(entries: list):
+    """Give entries whose outputs would overwrite each other (same repo and subtree) a ref suffix."""
+    names = {}
+    for entry in entries:
+        if entry.base:
+            continue  # delta artifacts are already named by commit range
+        try:
+            name = open_source(entry.repo, entry.ref, entry.path).name
+        except SourceError:
+            continue  # the job itself reports the bad target
+        names.setdefault(name, []).append(entry)
+    for name, group in names.items():
+        if len(group) > 1:
+            for i, entry in enumerate(group):
+                ref = re.sub(r"[^\w.-]", "_", entry.ref or "default")
+                entry.name = f"{name}_{ref}_{i}"
+
+def batch_line(entry: BatchEntry, event) -> str:
+    """A job event as a batch protocol line: tagged with its repo, job DONE/ERROR demoted to ARTIFACT/WARNING."""
+    if isinstance(event, Done):
+        return "".join(f"ARTIFACT:{name}\n" for name in event.artifacts)
+    if isinstance(event, Error):
+        return f"WARNING:[{entry.tag}] {event.message}\n"
+    kind, message = event.to_line().split(":", 1)
+    return f"{kind}:[{entry.tag}] {message}"
+
+def record(entry: BatchEntry, event):
+    """Update the entry's manifest fields from a job event."""
+    if isinstance(event, Done):
+        entry.artifacts = event.artifacts
+        entry.files = event.files
+        entry.failed_files = event.failed
+        entry.omitted_files = len(event.omitted)
+        entry.cached = event.cached
+        entry.status = "partial" if event.failed or event.omitted else "ok"
+    elif isinstance(event, Error):
+        entry.status = "failed"
+        entry.error = event.message
+
+async def run_batch(client: CrawlClient, entries: list, options: CrawlOptions = None,
+                    concurrency: int = BATCH_CONCURRENCY, semaphore: asyncio.Semaphore = None):
+    """
+    Crawl every entry on `client`, at most `concurrency` at once, yielding
+    (entry, event) as jobs progress; the manifest path is yielded last as
+    (None, path). A shared `semaphore` (e.g. one per server) replaces the
+    per-batch limit.
+    """
+    options = options or CrawlOptions()
+    started = time.monotonic()
+    started_at = time.strftime("%Y%m%d-%H%M%S")
+    semaphore = semaphore or asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue()
+    assign_names(entries)
+
+    async def run_one(entry: BatchEntry):
+        queued = time.monotonic()
+        async with semaphore:
+            entry.queued = time.monotonic() - queued
+            entry.status = "running"
+            job_options = replace(options, ref=entry.ref, path=entry.path, base=entry.base or options.base,
+                                  name=entry.name)
+            job_started = time.monotonic()
+            try:
+                async for event in client.crawl(entry.repo, job_options):
+                    record(entry, event)
+                    await queue.put((entry, event))
+            finally:
+                entry.elapsed = time.monotonic() - job_started
+                if entry.status == "running":
+                    entry.status = "failed"
+                    entry.error = entry.error or "job ended without a result"
+
+    async def run_all():
+        try:
+            await asyncio.gather(*(run_one(entry) for entry in entries))
+        finally:
+            await queue.put(None)
+
+    runner = asyncio.create_task(run_all())
+    try:
+        while (item := await queue.get()) is not None:
+            yield item
+        await runner
+    finally:
+        runner.cancel()
+
+    manifest = {
+        "started": started_at,
+        "elapsed": round(time.monotonic() - started, 3),
+        "job_seconds": round(sum(e.elapsed for e in entries), 3),  # what running them one by one would cost
+        "concurrency": concurrency,
+        "directory": client.output_dir,
+        "formats": list(options.formats),
+        "succeeded": sum(e.status in ("ok", "partial") for e in entries),
+        "failed": sum(e.status == "failed" for e in entries),
+        "jobs": [asdict(e) for e in entries],
+    }
+    os.makedirs(client.output_dir, exist_ok=True)
+    # Random suffix: concurrent batches on a server may start in the same second
+    path = os.path.join(client.output_dir, f"batch_{started_at}_{secrets.token_hex(3)}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    yield None, path
+
+async def main(entries: list, options: CrawlOptions, concurrency: int, output_dir: str):
+    async with CrawlClient(output_dir=output_dir) as client:
+        async for entry, event in run_batch(client, entries, options, concurrency):
+            if entry is None:
+                succeeded = sum(e.status != "failed" for e in entries)
+                print(f"STATUS:{succeeded} of {len(entries)} repositories succeeded.", flush=True)
+                print(f"DONE:{os.path.basename(event)}", flush=True)
+            else:
+                print(batch_line(entry, event), end="", flush=True)
+
+if __name__ == "__main__":
+    # Playwright needs the Proactor loop on Windows
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+    parser = argparse.ArgumentParser(description="Repo2Context batch crawler")
+    parser.add_argument("sources", nargs="+",
+                        help="Repo list files (one `<url or path> [ref] [path]` per line, or JSON), '-' for stdin")
+    parser.add_argument("--jobs", type=int, default=BATCH_CONCURRENCY,
+                        help=f"Repositories crawled at once (default: {BATCH_CONCURRENCY})")
+    parser.add_argument("--output", default=OUTPUT_DIR, help=f"Directory for artifacts and the manifest (default: {OUTPUT_DIR})")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Per-repo deadline in seconds")
+    parser.add_argument("--format", default="txt",
+                        help=f"Comma-separated output formats: {', '.join(OUTPUT_FORMATS)} (default: txt)")
+    parser.add_argument("--base", default=None,
+                        help="Delta mode for every repo: only files changed since this ref")
+    parser.add_argument("--diffs", action="store_true", help="Delta mode: include unified diffs of modified files")
+    args = parser.parse_args()
+
+    entries = []
+    for source in args.sources:
+        if source == "-":
+            entries += parse_batch(sys.stdin.read())
+        else:
+            with open(source, encoding="utf-8") as f:
+                entries += parse_batch(f.read())
+    if not entries:
+        print("ERROR:No repositories given", flush=True)
+        sys.exit(1)
+
+    options = CrawlOptions(
+        deadline=args.deadline,
+        formats=tuple(f.strip() for f in args.format.split(",") if f.strip()),
+        base=args.base,
+        diffs=args.diffs,
+        tenant="batch"
+    )
+    asyncio.run(main(entries, options, args.jobs, args.output))
@@ -0,0 +1,325 @@
+"""
+Async library API.
+One `CrawlClient` owns the HTTP fetcher and (lazily) the browser, and
+any number of concurrent crawls share them:
+
+    async with CrawlClient() as client:
+        async for event in client.crawl("https://github.com/owner/repo", CrawlOptions(formats=("txt", "jsonl"))):
+            if isinstance(event, Done):
+                print(event.artifacts)
+
+The worker, the web server and `crawler.crawl_repo` are thin wrappers
+that render these events as text lines. Concurrent crawls share the
+fetch slots through the client's `FairScheduler`, per `CrawlOptions.tenant`.
+"""
+import os
+import time
+import shutil
+import asyncio
+from dataclasses import dataclass
+from contextlib import AsyncExitStack
+from .config import FETCH_CONCURRENCY, OUTPUT_DIR
+from .events import Status, Discovered, Fetched, Skipped, Failed, Progress, Done, Error
+from .fetcher import RawFetcher
+from .scheduler import FairScheduler
+from .sources import open_source, is_github_target, default_browser_config, SourceError
+from .snapshot import SnapshotWriter
+from .writers import open_writers
+from .delta import delta_cache_path, delta_filename, delta_header, deleted_files_block, unified_diff_block
+from .utils import is_useful_file, file_priority, omitted_files_block, context_block
+
+@dataclass
+class CrawlOptions:
+    ref: str | None = None        # branch, tag or commit (GitHub default branch / local HEAD when unset)
+    path: str = ""                # only crawl this subtree
+    deadline: float | None = None # seconds; a partial context is finalized when it expires
+    formats: tuple = ("txt",)     # any of txt, jsonl, parquet, arrow; the first is the primary artifact
+    base: str | None = None       # delta mode: only files changed between base and ref
+    diffs: bool = False           # delta mode: append unified diffs of modified files
+    tenant: str = "default"       # API key or client IP; fetch slots are shared fairly per tenant
+    name: str | None = None       # output file name stem (default: repo name, plus subtree)
+
+def remaining_time(started: float, deadline: float | None) -> float | None:
+    """Seconds left before the job deadline, or None when there is no deadline."""
+    if deadline is None:
+        return None
+    return max(deadline - (time.monotonic() - started), 0.0)
+
+async def fetch_until(source, paths: list, timeout: float | None) -> tuple:
+    """
+    Fetch `paths` with one task per file, so files that finish before `timeout`
+    are kept. Returns ([(path, FetchResult)] of finished files, unfinished paths).
+    """
+    tasks = [asyncio.ensure_future(source.fetch_many([path])) for path in paths]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    finished = [(path, task.result()[0]) for path, task in zip(paths, tasks) if task not in pending]
+    return finished, [path for path, task in zip(paths, tasks) if task in pending]
+
+class CrawlClient:
+    """Async context manager holding the fetch pools shared by every crawl it runs."""
+
+    def __init__(self, concurrency: int = FETCH_CONCURRENCY, output_dir: str = OUTPUT_DIR):
+        self.concurrency = concurrency
+        self.output_dir = output_dir
+        self.scheduler = FairScheduler(concurrency)
+        self.fetcher = None
+        self._crawler = None
+        self._browser_lock = asyncio.Lock()
+        self._stack = None
+
+    async def __aenter__(self):
+        self._stack = AsyncExitStack()
+        self.fetcher = await self._stack.enter_async_context(RawFetcher(self.concurrency, scheduler=self.scheduler))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._stack.aclose()
+
+    async def browser(self):
+        """Shared AsyncWebCrawler, started on first use (local and delta jobs never need it)."""
+        async with self._browser_lock:
+            if self._crawler is None:
+                from crawl4ai import AsyncWebCrawler
+                self._crawler = await self._stack.enter_async_context(
+                    AsyncWebCrawler(config=default_browser_config())
+                )
+        return self._crawler
+
+    def open_source(self, repo: str, options: CrawlOptions, job=None):
+        return open_source(repo, options.ref, options.path, fetcher=self.fetcher, browser=self.browser, job=job)
+
+    async def crawl(self, repo: str, options: CrawlOptions = None):
+        """Crawl `repo` (GitHub URL or local repository path), yielding typed events."""
+        options = options or CrawlOptions()
+        started = time.monotonic()
+        # Only fetcher-backed (GitHub) jobs take fetch slots; local reads would just dilute the tenant's share
+        job = self.scheduler.open_job(options.tenant) if is_github_target(repo) else None
+        yield Status("Starting delta scan..." if options.base else "Starting repository scan...")
+        try:
+            source = self.open_source(repo, options, job)
+            async with source:
+                if options.base:
+                    pipeline = self._crawl_delta(source, options, started)
+                else:
+                    pipeline = self._crawl_full(source, options, started)
+                try:
+                    async for event in pipeline:
+                        yield event
+                finally:
+                    # Runs the pipeline's cleanup now, also when our consumer stops early
+                    await pipeline.aclose()
+        except SourceError as e:
+            yield Error(str(e))
+        except Exception as e:
+            yield Error(f"Critical crawler error: {e}")
+        finally:
+            if job is not None:
+                self.scheduler.close_job(job)
+
+    @staticmethod
+    def share(source) -> str:
+        """The job's current fetch slot share, for progress events."""
+        return source.job.describe() if source.job else ""
+
+    async def _crawl_full(self, source, options: CrawlOptions, started: float):
+        deadline = options.deadline
+        yield Status(f"Fetching file list from {source.label}...")
+
+        # Step 1: Get repository file list
+        try:
+            ref, listed = await asyncio.wait_for(source.list_files(), timeout=remaining_time(started, deadline))
+        except asyncio.TimeoutError:
+            if deadline is None:
+                # The source's own timeout (browser or network), not a job deadline
+                yield Error(f"Timed out fetching the file list from {source.label}.")
+            else:
+                yield Error(f"Deadline of {deadline:g}s reached before the file list was fetched.")
+            return
+
+        # Highest-value files first: README, manifests, entry points ... tests last
+        unique_files = sorted((p for p in listed if is_useful_file(p)), key=file_priority)
+        if not unique_files:
+            yield Error("No relevant files found. Is this a public repository?")
+            return
+        yield Discovered(ref, unique_files)
+
+        # Step 2: Fetch file contents, streaming them into every output
+        try:
+            writers = open_writers(options.name or source.name, list(options.formats), ref, self.output_dir)
+        except (ValueError, RuntimeError) as e:
+            yield Error(str(e))
+            return
+        snapshot = SnapshotWriter(source.key, source.snapshot_ref, prefix=source.prefix, alias=source.ref)
+
+        finished = False
+        try:
+            omitted = []
+            stop_reason = ""
+            failed = []
+            fetched = 0
+            total = len(unique_files)
+            batch_size = self.concurrency
+            for i in range(0, total, batch_size):
+                batch_paths = unique_files[i:i+batch_size]
+                timeout = remaining_time(started, deadline)
+                if timeout == 0:
+                    omitted, stop_reason = unique_files[i:], f"deadline of {deadline:g}s reached"
+                    break
+                if source.job and source.job.over_quota():
+                    omitted, stop_reason = unique_files[i:], "tenant byte quota reached"
+                    break
+                if source.job:
+                    source.job.remaining = total - i
+                yield Progress(i, total, fetched, len(failed), source.load_state(), self.share(source))
+
+                finished_files, pending = await fetch_until(source, batch_paths, timeout)
+                if pending:
+                    omitted = pending + unique_files[i+batch_size:]
+                    stop_reason = f"deadline of {deadline:g}s reached"
+
+                for path, res in finished_files:
+                    name = f"{ref}/{path}"
+                    if res.success:
+                        for writer in writers:
+                            writer.add(path, res.content)
+                        snapshot.add(path, res.content)
+                        fetched += 1
+                        yield Fetched(name, len(res.content))
+                    elif res.skipped:
+                        yield Skipped(name, res.error_message)
+                    else:
+                        failed.append(name)
+                        yield Failed(name, res.error_message)
+                if pending:
+                    break
+
+            yield Progress(total - len(omitted), total, fetched, len(failed), source.load_state(), self.share(source))
+
+            notes = []
+            if failed:
+                notes.append(omitted_files_block(failed, "fetch failed after retries"))
+            if omitted:
+                yield Status(f"{stop_reason.capitalize()}; {len(omitted)} files omitted from context.", warning=True)
+                omitted = [f"{ref}/{p}" for p in omitted]
+                notes.append(omitted_files_block(omitted, stop_reason))
+
+            # Step 3: Finalize outputs and publish the snapshot for /query
+            if not snapshot.close(omitted=[*failed, *omitted]):
+                yield Status("Partial crawl; /query keeps using the previous complete snapshot.", warning=True)
+            for writer in writers:
+                for note in notes:
+                    writer.note(note)
+                writer.close()
+            finished = True
+        finally:
+            # Disconnected client, cancellation or error: keep the previous artifacts and snapshot
+            if not finished:
+                snapshot.abort()
+                for writer in writers:
+                    writer.abort()
+
+        artifacts = [os.path.basename(w.filepath) for w in writers]
+        yield Done(artifacts[0], self.output_dir, artifacts, fetched, failed, omitted,
+                   elapsed=time.monotonic() - started)
+
+    async def _crawl_delta(self, source, options: CrawlOptions, started: float):
+        """Fetch only the files changed between options.base and the source ref."""
+        deadline = options.deadline
+        unsupported = [f for f in options.formats if f != "txt"]
+        if unsupported:
+            yield Error(f"Delta jobs only produce a txt artifact; unsupported format(s): {', '.join(unsupported)}")
+            return
+        yield Status(f"Comparing {options.base}..{source.ref or 'HEAD'} in {source.label}...")
+        try:
+            changeset = await asyncio.wait_for(source.list_changes(options.base),
+                                               timeout=remaining_time(started, deadline))
+        except asyncio.TimeoutError:
+            if deadline is None:
+                yield Error(f"Timed out comparing {options.base}..{source.ref or 'HEAD'} in {source.label}.")
+            else:
+                yield Error(f"Deadline of {deadline:g}s reached before the change list was fetched.")
+            return
+        base_commit, head_commit = changeset.base_commit, changeset.head_commit
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = delta_filename(options.name or source.name, base_commit, head_commit)
+        filepath = os.path.join(self.output_dir, filename)
+        cache_path = delta_cache_path(source.key, base_commit, head_commit, source.prefix, options.diffs)
+        if os.path.exists(cache_path):
+            yield Status(f"Using cached delta for {base_commit[:12]}..{head_commit[:12]}")
+            shutil.copyfile(cache_path, filepath)
+            yield Done(filename, self.output_dir, [filename], cached=True, elapsed=time.monotonic() - started)
+            return
+
+        changes = [c for c in changeset.changes if is_useful_file(c.path)]
+        changed = sorted((c for c in changes if c.status != "D"), key=lambda c: file_priority(c.path))
+        deleted = [c.path for c in changes if c.status == "D"]
+        yield Discovered(head_commit, [c.path for c in changed])
+        yield Status(f"{len(changed)} changed and {len(deleted)} deleted files.")
+
+        parts = [delta_header(base_commit, head_commit, changed + [c for c in changes if c.status == "D"])]
+        paths = [c.path for c in changed]
+        omitted = []
+        stop_reason = ""
+        failed = []
+        fetched = 0
+        batch_size = self.concurrency
+        for i in range(0, len(paths), batch_size):
+            batch_paths = paths[i:i+batch_size]
+            timeout = remaining_time(started, deadline)
+            if timeout == 0:
+                omitted, stop_reason = paths[i:], f"deadline of {deadline:g}s reached"
+                break
+            if source.job and source.job.over_quota():
+                omitted, stop_reason = paths[i:], "tenant byte quota reached"
+                break
+            if source.job:
+                source.job.remaining = len(paths) - i
+            yield Progress(i, len(paths), fetched, len(failed), source.load_state(), self.share(source))
+
+            finished_files, pending = await fetch_until(source, batch_paths, timeout)
+            for path, res in finished_files:
+                if res.success:
+                    parts.append(context_block(path, res.content))
+                    fetched += 1
+                    yield Fetched(path, len(res.content))
+                elif res.skipped:
+                    yield Skipped(path, res.error_message)
+                else:
+                    failed.append(path)
+                    yield Failed(path, res.error_message)
+            if pending:
+                omitted, stop_reason = pending + paths[i+batch_size:], f"deadline of {deadline:g}s reached"
+                break
+
+        if deleted:
+            parts.append(deleted_files_block(deleted))
+        if options.diffs:
+            modified = [c.path for c in changed if c.status == "M" and c.path not in omitted]
+            parts.append(unified_diff_block(await source.diff(changeset, modified)))
+
+        text = "".join(parts)
+        notes = []
+        if failed:
+            notes.append(omitted_files_block(failed, "fetch failed after retries"))
+        if omitted:
+            yield Status(f"{stop_reason.capitalize()}; {len(omitted)} files omitted from context.", warning=True)
+            notes.append(omitted_files_block(omitted, stop_reason))
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(text + "".join(notes))
+        # Only complete deltas are cached
+        if not notes:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+        yield Done(filename, self.output_dir, [filename], fetched, failed, omitted,
+                   elapsed=time.monotonic() - started)
@@ -1,14 +1,112 @@
+import os
+
 # Intelligent Filtering Constants
 IGNORE_EXTENSIONS = {
-    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.woff', '.woff2', '.ttf', '.eot',
-    '.mp4', '.pdf', '.zip', '.gz', '.tar', '.lock', '.pyc', '.exe', '.bin', '.ipynb'
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp', '.bmp',
+    '.woff', '.woff2', '.ttf', '.eot', '.otf',
+    '.mp3', '.mp4', '.wav', '.avi', '.mov',
+    '.zip', '.tar', '.gz', '.rar', '.7z',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx',
+    '.lock', '.pyc', '.exe', '.bin', '.ipynb'
 }
 
 IGNORE_FILES = {
-    'package-lock.json', 'yarn.lock', 'poetry.lock', 'pnpm-lock.yaml',
-    '.gitignore', '.DS_Store', 'LICENSE', 'MANIFEST.in', 'uv.lock'
+    'package-lock.json', 'yarn.lock', 'poetry.lock', 'pnpm-lock.yaml', 'uv.lock', 'go.sum',
+    '.gitignore', '.dockerignore', '.DS_Store', 'LICENSE', 'MANIFEST.in'
 }
 
 IGNORE_DIRS = {
-    'node_modules', '.git', '.github', '__pycache__', 'venv', 'env', 'dist', 'build', '.venv', 'target'
+    'node_modules', '.git', '.github', '__pycache__', 'venv', 'env', 'dist', 'build', '.venv', 'target',
+    '.next', '.cache'
+}
+
+# Fetch Priority Constants (lower tier is fetched and emitted first)
+DOC_DIRS = {'docs', 'doc', 'documentation'}
+
+# .txt only counts as documentation inside DOC_DIRS (requirements.txt, CMakeLists.txt are not docs)
+DOC_EXTENSIONS = {'.md', '.rst', '.adoc'}
+
+MANIFEST_FILES = {
+    'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'Pipfile',
+    'package.json', 'tsconfig.json', 'deno.json', 'Cargo.toml', 'go.mod',
+    'pom.xml', 'build.gradle', 'build.gradle.kts', 'Gemfile', 'composer.json',
+    'mix.exs', 'CMakeLists.txt', 'Makefile', 'Dockerfile', 'docker-compose.yml'
+}
+
+ENTRY_POINT_FILES = {
+    'main.py', '__main__.py', 'app.py', 'cli.py', 'server.py', 'manage.py', 'wsgi.py', 'asgi.py',
+    'index.js', 'index.ts', 'main.js', 'main.ts', 'server.js', 'server.ts', 'app.js', 'app.ts',
+    'main.go', 'main.rs', 'lib.rs', 'Main.java', 'Program.cs', 'main.c', 'main.cpp'
+}
+
+LOW_PRIORITY_DIRS = {
+    'tests', 'test', '__tests__', 'spec', 'specs', 'fixtures', '__fixtures__', '__mocks__',
+    'testdata', 'test_data', 'vendor', 'third_party', 'examples', 'benchmarks'
+}
+
+# Snapshot Store Constants
+SNAPSHOT_DIR = 'snapshots'
+SNAPSHOT_TRIGRAMS = True
+
+# Rate Governor Constants
+# Sustained requests/second and burst size per upstream host
+HOST_RATE_LIMITS = {
+    'raw.githubusercontent.com': (20.0, 40),
+    'api.github.com': (5.0, 10),
+    'github.com': (2.0, 4),
 }
+DEFAULT_HOST_RATE_LIMIT = (5.0, 10)
+
+# Hosts that accept the GitHub auth tokens from GITHUB_TOKENS / GITHUB_TOKEN
+GITHUB_AUTH_HOSTS = {'raw.githubusercontent.com', 'api.github.com'}
+
+MAX_RETRIES = 8
+BACKOFF_BASE = 0.5   # seconds, doubled on every retry
+BACKOFF_MAX = 60.0   # cap for a single backoff sleep
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Fetch Layer Constants
+FETCH_CONCURRENCY = 16
+FETCH_TIMEOUT = 30.0
+
+# Local Git Source Constants
+LOCAL_READ_WORKERS = 8   # parallel `git cat-file --batch` readers
+BINARY_SNIFF_BYTES = 8000
+# Web jobs may only read local repositories under this directory (unset disables them)
+LOCAL_REPO_ROOT = os.environ.get('LOCAL_REPO_ROOT')
+
+# Output Format Constants
+OUTPUT_DIR = 'static'
+OUTPUT_FORMATS = ('txt', 'jsonl', 'parquet', 'arrow')
+ARROW_BATCH_ROWS = 256   # rows buffered per Arrow record batch / Parquet row group
+
+LANGUAGE_EXTENSIONS = {
+    '.py': 'python', '.pyi': 'python', '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.jsx': 'javascript', '.ts': 'typescript', '.tsx': 'typescript', '.go': 'go', '.rs': 'rust',
+    '.java': 'java', '.kt': 'kotlin', '.scala': 'scala', '.rb': 'ruby', '.php': 'php', '.cs': 'csharp',
+    '.c': 'c', '.h': 'c', '.cpp': 'cpp', '.cc': 'cpp', '.hpp': 'cpp', '.swift': 'swift', '.m': 'objective-c',
+    '.sh': 'shell', '.bash': 'shell', '.ps1': 'powershell', '.sql': 'sql', '.r': 'r', '.lua': 'lua',
+    '.ex': 'elixir', '.exs': 'elixir', '.erl': 'erlang', '.hs': 'haskell', '.dart': 'dart', '.vue': 'vue',
+    '.svelte': 'svelte', '.html': 'html', '.css': 'css', '.scss': 'scss', '.md': 'markdown', '.rst': 'rst',
+    '.json': 'json', '.yaml': 'yaml', '.yml': 'yaml', '.toml': 'toml', '.xml': 'xml', '.ini': 'ini',
+    '.cfg': 'ini', '.txt': 'text'
+}
+LANGUAGE_FILES = {'Dockerfile': 'dockerfile', 'Makefile': 'makefile', 'CMakeLists.txt': 'cmake'}
+
+# Delta Job Constants
+GITHUB_API = 'https://api.github.com'
+COMPARE_MAX_FILES = 300  # compare API lists at most this many files; larger ranges diff the two trees
+DELTA_DIR = 'deltas'     # cached delta artifacts, keyed by (base, head) commit pair
+
+# Fair Scheduling Constants
+# Fetch slots are shared across jobs by weighted fair queuing; a tenant is an API key or client IP
+TENANT_WEIGHTS = {}                  # tenant id -> weight (default 1.0), e.g. {'key:3f2a9c1b0d4e': 4.0}
+TENANT_MAX_CONCURRENCY = 8           # fetch slots one tenant may hold at once
+TENANT_BYTE_QUOTA = 2 * 1024 ** 3    # bytes one tenant may fetch per quota window
+TENANT_QUOTA_WINDOW = 3600.0         # seconds
+SJF_REFERENCE_FILES = 1000           # jobs with fewer files left than this get a weight boost...
+SJF_MAX_BOOST = 8.0                  # ...of up to this factor
+
+# Batch Job Constants
+BATCH_CONCURRENCY = 8    # repositories crawled at once; their fetches share the client's slots
+BATCH_MAX_REPOS = 500    # per /batch request
@@ -0,0 +1,36 @@
+"""
+Delta context artifacts.
+A delta holds only what changed between two commits: changed files in
+full, deleted paths, and optionally unified diffs for modified files.
+Artifacts are cached per (base, head) commit pair, so repeated nightly
+syncs of the same range cost nothing:
+
+    deltas/<owner>__<repo>/<base sha>..<head sha>[@<path prefix>][+diff].txt
+"""
+import os
+from .config import DELTA_DIR
+
+def delta_cache_path(repo: str, base_commit: str, head_commit: str, prefix: str = "",
+                     diffs: bool = False, root: str = DELTA_DIR) -> str:
+    scope = f"{base_commit}..{head_commit}"
+    if prefix:
+        scope += "@" + prefix.strip("/").replace("/", "__")
+    if diffs:
+        scope += "+diff"
+    return os.path.join(root, repo, scope + ".txt")
+
+def delta_filename(name: str, base_commit: str, head_commit: str) -> str:
+    return f"llm_delta_{name}_{base_commit[:12]}..{head_commit[:12]}.txt"
+
+def delta_header(base_commit: str, head_commit: str, changes: list) -> str:
+    """Summary block listing every change as `<status> <path>`."""
+    listing = "\n".join(f"{c.status} {c.path}" for c in changes)
+    return (f"--- DELTA: {base_commit}..{head_commit} (A added, M modified, D deleted) ---\n"
+            f"{listing}\n--- END OF DELTA SUMMARY ---")
+
+def deleted_files_block(paths: list) -> str:
+    listing = "\n".join(paths)
+    return f"\n\n--- DELETED FILES ---\n{listing}\n--- END OF DELETED FILES ---"
+
+def unified_diff_block(diff: str) -> str:
+    return f"\n\n--- UNIFIED DIFF ---\n{diff.rstrip()}\n--- END OF UNIFIED DIFF ---"
@@ -0,0 +1,87 @@
+"""
+Typed crawl events.
+`CrawlClient.crawl()` yields these instead of text lines. Each event can
+still render itself in the worker's line protocol (STATUS:/PROGRESS:/
+WARNING:/ERROR:/ARTIFACT:/DONE:) via `to_line()`.
+"""
+from dataclasses import dataclass, field
+
+@dataclass
+class Status:
+    """Phase change or informational message."""
+    message: str
+    warning: bool = False
+
+    def to_line(self) -> str:
+        return f"{'WARNING' if self.warning else 'STATUS'}:{self.message}\n"
+
+@dataclass
+class Discovered:
+    """Files selected for the job, in fetch (priority) order."""
+    ref: str
+    paths: list
+
+    def to_line(self) -> str:
+        return f"STATUS:Found {len(self.paths)} code files.\n"
+
+@dataclass
+class Fetched:
+    path: str
+    size: int
+
+    def to_line(self) -> str:
+        return f"PROGRESS:{self.path}\n"
+
+@dataclass
+class Skipped:
+    """Deliberately left out (e.g. binary content); not a failure."""
+    path: str
+    reason: str
+
+    def to_line(self) -> str:
+        return f"STATUS:Skipped {self.path} ({self.reason})\n"
+
+@dataclass
+class Failed:
+    """Could not be fetched even after retries; listed in the output."""
+    path: str
+    reason: str
+
+    def to_line(self) -> str:
+        return f"WARNING:Failed to fetch {self.path} ({self.reason})\n"
+
+@dataclass
+class Progress:
+    done: int
+    total: int
+    fetched: int
+    failed: int
+    load: str = ""   # source load state, e.g. rate limiter counters
+    share: str = ""  # the job's fair share of fetch slots and its tenant's byte usage
+
+    def to_line(self) -> str:
+        load = "".join(f" [{part}]" for part in (self.load, self.share) if part)
+        return f"STATUS:Processed {self.done} of {self.total} files...{load}\n"
+
+@dataclass
+class Done:
+    """Job finished; `artifact` is the primary output file name inside `directory`."""
+    artifact: str
+    directory: str
+    artifacts: list = field(default_factory=list)  # every output, primary first
+    files: int = 0
+    failed: list = field(default_factory=list)
+    omitted: list = field(default_factory=list)
+    cached: bool = False
+    elapsed: float = 0.0
+
+    def to_line(self) -> str:
+        extra = "".join(f"ARTIFACT:{name}\n" for name in self.artifacts[1:])
+        return f"{extra}DONE:{self.artifact}\n"
+
+@dataclass
+class Error:
+    message: str
+
+    def to_line(self) -> str:
+        return f"ERROR:{self.message}\n"
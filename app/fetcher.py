@@ -0,0 +1,79 @@
+"""
+Raw file fetch layer.
+File contents are plain HTTP GETs against raw.githubusercontent.com, so
+they go through one pooled httpx client and the host rate governor
+instead of a browser page per file.
+"""
+import asyncio
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import httpx
+from .config import FETCH_CONCURRENCY, FETCH_TIMEOUT
+from .ratelimit import get_limiter
+from .scheduler import FairScheduler
+
+@dataclass
+class FetchResult:
+    url: str
+    success: bool
+    content: str = ""
+    status_code: int | None = None
+    error_message: str = ""
+    skipped: bool = False  # deliberately left out (e.g. binary), not a failure
+
+class RawFetcher:
+    """
+    Async context manager that fetches many URLs over one shared connection pool.
+    Its `concurrency` slots are shared between jobs by `scheduler`; pass a
+    job from `scheduler.open_job()` to every call made on a job's behalf.
+    """
+
+    def __init__(self, concurrency: int = FETCH_CONCURRENCY, timeout: float = FETCH_TIMEOUT,
+                 scheduler: FairScheduler = None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = None
+        self.scheduler = scheduler or FairScheduler(concurrency)
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def get(self, url: str, headers: dict = None, job=None) -> httpx.Response:
+        """
+        GET through the host rate governor and the fair scheduler; raises
+        httpx.HTTPError on transport failure. Each attempt queues for its own
+        slot, so retries waiting out a backoff don't keep other jobs waiting.
+        """
+        limiter = get_limiter(urlsplit(url).hostname)
+        response = await limiter.request(self.client, "GET", url, headers=headers,
+                                         slot=lambda: self.scheduler.slot(job))
+        if job is not None:
+            job.charge(len(response.content))
+        return response
+
+    async def fetch(self, url: str, job=None) -> FetchResult:
+        try:
+            response = await self.get(url, job=job)
+        except httpx.HTTPError as e:
+            return FetchResult(url, False, error_message=str(e) or type(e).__name__)
+        if response.status_code != 200:
+            return FetchResult(url, False, status_code=response.status_code,
+                               error_message=f"HTTP {response.status_code}")
+        return FetchResult(url, True, response.text, response.status_code)
+
+    async def fetch_many(self, urls: list, job=None) -> list:
+        """Fetch URLs concurrently; results keep the order of `urls`."""
+        return await asyncio.gather(*(self.fetch(url, job) for url in urls))
+
+    def limiter_state(self, urls: list) -> str:
+        """Limiter state for the hosts behind `urls`, for progress lines."""
+        hosts = sorted({urlsplit(url).hostname for url in urls})
+        return "; ".join(get_limiter(host).describe() for host in hosts)
@@ -0,0 +1,207 @@
+"""
+Host-level rate governor.
+One limiter per upstream host, shared by every job in the process:
+a token bucket paces requests, rate-limit headers and Retry-After pause
+the host (or a single auth token), and transient failures are retried
+with jittered exponential backoff.
+"""
+import os
+import time
+import random
+import asyncio
+import contextlib
+from email.utils import parsedate_to_datetime
+import httpx
+from .config import (
+    HOST_RATE_LIMITS, DEFAULT_HOST_RATE_LIMIT, GITHUB_AUTH_HOSTS,
+    MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX, RETRY_STATUS_CODES
+)
+
+def load_auth_tokens() -> list:
+    """Auth tokens from GITHUB_TOKENS (comma-separated) or GITHUB_TOKEN."""
+    raw = os.environ.get("GITHUB_TOKENS") or os.environ.get("GITHUB_TOKEN", "")
+    return [t.strip() for t in raw.split(",") if t.strip()]
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+class TokenBucket:
+    """Classic token bucket; `pause()` blocks all callers until a point in time."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class AuthPool:
+    """Rotates requests across auth tokens, skipping tokens whose quota is spent."""
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.remaining = {t: None for t in tokens}
+        self.reset_at = {t: 0.0 for t in tokens}
+        self._next = 0
+
+    def usable(self, token: str) -> bool:
+        return self.remaining[token] != 0 or time.time() >= self.reset_at[token]
+
+    def choose(self) -> str | None:
+        """Next usable token, None when there are no tokens or all are exhausted."""
+        for _ in range(len(self.tokens)):
+            token = self.tokens[self._next]
+            self._next = (self._next + 1) % len(self.tokens)
+            if self.usable(token):
+                return token
+        return None
+
+    def seconds_until_available(self) -> float:
+        if not self.tokens:
+            return 0.0
+        return max(min(self.reset_at.values()) - time.time(), 0.0)
+
+    def update(self, token: str, remaining: int | None, reset_at: float | None):
+        if remaining is not None:
+            self.remaining[token] = remaining
+        if reset_at is not None:
+            self.reset_at[token] = reset_at
+
+    def exhausted(self) -> bool:
+        """True when there are tokens but none is usable; does not move the rotation."""
+        return bool(self.tokens) and not any(self.usable(t) for t in self.tokens)
+
+class HostLimiter:
+    """Paces, authenticates and retries every request to one host."""
+
+    def __init__(self, host: str, rate: float, capacity: int, tokens: list = None):
+        self.host = host
+        self.bucket = TokenBucket(rate, capacity)
+        self.auth = AuthPool(tokens or [])
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def _observe(self, token: str | None, response: httpx.Response) -> float | None:
+        """Record rate-limit headers; returns how long to back off if throttled."""
+        headers = response.headers
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        remaining = int(remaining) if remaining and remaining.isdigit() else None
+        reset_at = float(reset) if reset and reset.isdigit() else None
+        if token:
+            self.auth.update(token, remaining, reset_at)
+
+        wait = retry_after_seconds(headers.get("retry-after"))
+        throttled = response.status_code == 429 or (
+            response.status_code == 403 and (wait is not None or remaining == 0)
+        )
+        if not throttled:
+            return None
+        self.throttled += 1
+        if wait is None and reset_at is not None:
+            wait = max(reset_at - time.time(), 0.0)
+        if token:
+            # Park this token until its window resets; others may still have quota
+            self.auth.update(token, 0, time.time() + (wait or 0.0))
+            if not self.auth.exhausted():
+                return 0.0
+        return wait
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, slot=None, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying throttling and transient errors until MAX_RETRIES.
+        `slot` (a callable returning an async context manager, e.g. a fair
+        scheduler slot) is held only while an attempt is in flight, never
+        through rate-limit waits or backoff sleeps.
+        """
+        slot = slot or contextlib.nullcontext
+        base_headers = kwargs.pop("headers", None) or {}
+        for attempt in range(MAX_RETRIES + 1):
+            if self.auth.exhausted():
+                self.bucket.pause(self.auth.seconds_until_available())
+            await self.bucket.acquire()
+
+            token = self.auth.choose()
+            headers = dict(base_headers)
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            self.requests += 1
+            try:
+                async with slot():
+                    response = await client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError:
+                if attempt == MAX_RETRIES:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            wait = self._observe(token, response)
+            retryable = wait is not None or response.status_code in RETRY_STATUS_CODES
+            if not retryable or attempt == MAX_RETRIES:
+                return response
+
+            self.retries += 1
+            delay = backoff_delay(attempt)
+            if wait:
+                # Hold the whole host so other jobs don't burn the same quota
+                self.bucket.pause(wait)
+                delay = max(delay, wait)
+            await asyncio.sleep(delay)
+
+    def describe(self) -> str:
+        """One-line limiter state for job progress output."""
+        state = f"{self.host}: {self.requests} req, {self.retries} retries, {self.throttled} throttled"
+        paused = self.bucket.paused_until - time.monotonic()
+        if paused > 0:
+            state += f", paused {paused:.0f}s"
+        if self.auth.tokens:
+            usable = sum(1 for t in self.auth.tokens if self.auth.usable(t))
+            state += f", {usable}/{len(self.auth.tokens)} tokens"
+        return state
+
+# Process-wide limiters, one per host
+_limiters = {}
+
+def get_limiter(host: str) -> HostLimiter:
+    if host not in _limiters:
+        rate, capacity = HOST_RATE_LIMITS.get(host, DEFAULT_HOST_RATE_LIMIT)
+        tokens = load_auth_tokens() if host in GITHUB_AUTH_HOSTS else []
+        _limiters[host] = HostLimiter(host, rate, capacity, tokens)
+    return _limiters[host]
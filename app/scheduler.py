@@ -0,0 +1,188 @@
+"""
+Fair scheduling of fetch slots across concurrent jobs.
+Every fetch takes one of the fetcher's slots. When jobs compete, slots
+go out by weighted fair queuing: each request gets a virtual finish tag
+`max(V, job.finish) + 1 / weight` and the smallest eligible tag runs
+next. A job's weight is its tenant's weight split over the tenant's open
+jobs, boosted for jobs with few files left (shortest job first), so a
+50k-file monorepo cannot starve small repos queued behind it.
+
+Tenants are also capped at TENANT_MAX_CONCURRENCY slots (idle slots
+may be borrowed past the cap while no other tenant is waiting) and at
+TENANT_BYTE_QUOTA bytes per TENANT_QUOTA_WINDOW.
+"""
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from .config import (TENANT_WEIGHTS, TENANT_MAX_CONCURRENCY, TENANT_BYTE_QUOTA, TENANT_QUOTA_WINDOW,
+                     SJF_REFERENCE_FILES, SJF_MAX_BOOST)
+
+def sjf_boost(remaining: int | None) -> float:
+    """Weight multiplier for a job with `remaining` files left (1.0 when unknown or large)."""
+    if not remaining:
+        return 1.0
+    return min(max(SJF_REFERENCE_FILES / remaining, 1.0), SJF_MAX_BOOST)
+
+class Tenant:
+    def __init__(self, name: str, weight: float, max_concurrency: int, byte_quota: int, window: float):
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.byte_quota = byte_quota
+        self.window = window
+        self.jobs = set()
+        self.active = 0
+        self._charges = deque()  # (monotonic time, bytes) inside the quota window
+        self._bytes = 0
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.window
+        while self._charges and self._charges[0][0] < cutoff:
+            self._bytes -= self._charges.popleft()[1]
+
+    def charge(self, size: int):
+        self._charges.append((time.monotonic(), size))
+        self._bytes += size
+
+    def bytes_used(self) -> int:
+        self._expire()
+        return self._bytes
+
+    def over_quota(self) -> bool:
+        return self.bytes_used() >= self.byte_quota
+
+class Job:
+    """One crawl's handle on the scheduler; pass it to every fetch the crawl makes."""
+
+    def __init__(self, scheduler: "FairScheduler", tenant: Tenant):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.remaining = None  # files left to fetch, for the shortest-job-first boost
+        self.finish = 0.0      # virtual finish tag of the job's last request
+        self.active = 0
+        self.fetched_bytes = 0
+
+    @property
+    def weight(self) -> float:
+        return self.tenant.weight / max(len(self.tenant.jobs), 1) * sjf_boost(self.remaining)
+
+    def charge(self, size: int):
+        self.fetched_bytes += size
+        self.tenant.charge(size)
+
+    def over_quota(self) -> bool:
+        return self.tenant.over_quota()
+
+    def share(self) -> float:
+        """Fraction of the fetch slots this job is entitled to right now."""
+        return self.scheduler.share(self)
+
+    def describe(self) -> str:
+        slots = self.scheduler.slots
+        used = self.tenant.bytes_used() / 1024 ** 2
+        quota = self.tenant.byte_quota / 1024 ** 2
+        return (f"share {self.share():.0%} of {slots} slots, {self.active} active, "
+                f"tenant {used:.0f}/{quota:.0f} MiB")
+
+class FairScheduler:
+    """Hands out `slots` concurrent fetch slots by weighted fair queuing across jobs."""
+
+    def __init__(self, slots: int, tenant_weights: dict = None, tenant_max_concurrency: int = TENANT_MAX_CONCURRENCY,
+                 tenant_byte_quota: int = TENANT_BYTE_QUOTA, quota_window: float = TENANT_QUOTA_WINDOW):
+        self.slots = slots
+        self.tenant_weights = TENANT_WEIGHTS if tenant_weights is None else tenant_weights
+        self.tenant_max_concurrency = min(tenant_max_concurrency, slots)
+        self.tenant_byte_quota = tenant_byte_quota
+        self.quota_window = quota_window
+        self.tenants = {}
+        self.active = 0
+        self.virtual_time = 0.0
+        self._queue = []  # (finish tag, seq, start tag, job, future)
+        self._seq = itertools.count()
+        self._default = None
+
+    def _tenant(self, name: str) -> Tenant:
+        return Tenant(name, self.tenant_weights.get(name, 1.0), self.tenant_max_concurrency,
+                      self.tenant_byte_quota, self.quota_window)
+
+    def open_job(self, tenant: str = "default") -> Job:
+        # Forget idle tenants whose quota window has fully expired
+        for name, t in list(self.tenants.items()):
+            if not t.jobs and not t.active and not t.bytes_used():
+                del self.tenants[name]
+        if tenant not in self.tenants:
+            self.tenants[tenant] = self._tenant(tenant)
+        job = Job(self, self.tenants[tenant])
+        job.finish = self.virtual_time
+        job.tenant.jobs.add(job)
+        return job
+
+    def close_job(self, job: Job):
+        # The tenant itself stays until its quota window expires (see open_job)
+        job.tenant.jobs.discard(job)
+
+    def share(self, job: Job) -> float:
+        jobs = [j for t in self.tenants.values() for j in t.jobs]
+        total = sum(j.weight for j in jobs) or 1.0
+        if all(j.tenant is job.tenant for j in jobs):
+            return job.weight / total
+        return min(job.weight / total, job.tenant.max_concurrency / self.slots)
+
+    @asynccontextmanager
+    async def slot(self, job: Job = None):
+        """Hold one fetch slot for `job` (jobless callers share an implicit default job)."""
+        if job is None:
+            if self._default is None:
+                self._default = Job(self, self._tenant("default"))
+            job = self._default
+        start = max(self.virtual_time, job.finish)
+        job.finish = start + 1.0 / job.weight
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (job.finish, next(self._seq), start, job, future))
+        self._dispatch()
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Granted while we were being cancelled: hand the slot on
+                self._release(job)
+            raise
+        try:
+            yield job
+        finally:
+            self._release(job)
+
+    def _release(self, job: Job):
+        self.active -= 1
+        job.active -= 1
+        job.tenant.active -= 1
+        self._dispatch()
+
+    def _grant(self, entry: tuple):
+        _, _, start, job, future = entry
+        self.virtual_time = max(self.virtual_time, start)
+        self.active += 1
+        job.active += 1
+        job.tenant.active += 1
+        future.set_result(None)
+
+    def _dispatch(self):
+        """Grant free slots to the smallest finish tags whose tenant is under its concurrency cap."""
+        blocked = []
+        while self.active < self.slots and self._queue:
+            entry = heapq.heappop(self._queue)
+            job, future = entry[3], entry[4]
+            if future.done():
+                continue  # waiter was cancelled
+            if job.tenant.active >= job.tenant.max_concurrency:
+                blocked.append(entry)
+                continue
+            self._grant(entry)
+        # Nobody under their cap is waiting: lend the idle slots rather than waste them
+        while self.active < self.slots and blocked:
+            self._grant(blocked.pop(0))
+        for entry in blocked:
+            heapq.heappush(self._queue, entry)
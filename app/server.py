@@ -1,12 +1,29 @@
 """
 Repo2Context v2 - Web Server
-Uses subprocess to run the crawler, avoiding asyncio conflicts.
+Runs crawls in-process on one shared CrawlClient, so every job reuses
+the same HTTP pool, browser and rate limiters.
 """
+import asyncio
+import sys
+
+# --- CRITICAL: FIX FOR WINDOWS ASYNCIO EVENT LOOP ---
+# Playwright needs the Proactor loop; uvicorn imports this module directly
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
 from fasthtml.common import *
 from starlette.responses import StreamingResponse
-import subprocess
-import sys
 import os
+import re
+import json
+import hashlib
+
+from .client import CrawlClient, CrawlOptions
+from .batch import parse_batch, run_batch, batch_line
+from .snapshot import load_snapshot
+from .sources import is_github_target, local_repo_key, LocalGitSource, SourceError
+from .utils import repo_key, parse_github_url
+from .config import LOCAL_REPO_ROOT, BATCH_CONCURRENCY, BATCH_MAX_REPOS
 
 # Premium dark-mode CSS
 CUSTOM_CSS = """
@@ -200,7 +217,6 @@ async function processRepo(e) {
     e.preventDefault();
     const form = e.target;
     const btn = form.querySelector('button');
-    const input = form.querySelector('input');
     const statusArea = document.getElementById('status-area');
     const statusText = document.getElementById('status-text');
     const progressBar = document.getElementById('progress-bar');
@@ -220,7 +236,7 @@ async function processRepo(e) {
         const response = await fetch('/process', {
             method: 'POST',
             headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-            body: 'repo_url=' + encodeURIComponent(input.value)
+            body: new URLSearchParams(new FormData(form)).toString()
         });
 
         const reader = response.body.getReader();
@@ -256,6 +272,16 @@ async function processRepo(e) {
                     downloadLink.href = '/static/' + filename;
                     downloadLink.download = filename;
                     downloadArea.style.display = 'block';
+                } else if (line.startsWith('ARTIFACT:')) {
+                    const filename = line.substring(9);
+                    const entry = document.createElement('div');
+                    entry.className = 'log-entry success';
+                    const link = document.createElement('a');
+                    link.href = '/static/' + filename;
+                    link.download = filename;
+                    link.textContent = '⬇ ' + filename;
+                    entry.appendChild(link);
+                    logArea.appendChild(entry);
                 } else if (line.startsWith('ERROR:')) {
                     const entry = document.createElement('div');
                     entry.className = 'log-entry error';
@@ -281,8 +307,47 @@ async function processRepo(e) {
 }
 """
 
+def is_allowed_target(target: str) -> bool:
+    """GitHub repo URLs are always allowed, other URLs never; local paths only inside LOCAL_REPO_ROOT."""
+    if is_github_target(target):
+        try:
+            parse_github_url(target)
+        except ValueError:
+            return False
+        return True
+    if not LOCAL_REPO_ROOT:
+        return False
+    root = os.path.realpath(LOCAL_REPO_ROOT)
+    return os.path.commonpath([root, os.path.realpath(target)]) == root
+
+def tenant_id(request) -> str:
+    """Fair scheduling tenant: a hash of the X-API-Key header, else the client IP."""
+    api_key = request.headers.get('x-api-key', '').strip()
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+# One client (HTTP pool, browser, limiters) shared by every job in the process
+_client = None
+_client_lock = asyncio.Lock()
+
+# Repos crawled at once across every /batch request
+_batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+async def get_client() -> CrawlClient:
+    global _client
+    async with _client_lock:
+        if _client is None:
+            _client = await CrawlClient().__aenter__()
+    return _client
+
+async def close_client():
+    if _client is not None:
+        await _client.__aexit__(None, None, None)
+
 # FastHTML App
 app = FastHTML(
+    on_shutdown=[close_client],
     hdrs=(
         Link(rel="preconnect", href="https://fonts.googleapis.com"),
         Link(rel="preconnect", href="https://fonts.gstatic.com", crossorigin=""),
@@ -321,6 +386,16 @@ def get():
                             ),
                             cls="input-group"
                         ),
+                        Div(
+                            Span("⏱️", cls="icon"),
+                            Input(
+                                type="number",
+                                name="deadline",
+                                min="1",
+                                placeholder="Deadline in seconds (optional)"
+                            ),
+                            cls="input-group"
+                        ),
                         Button("Generate Context File", type="submit", cls="btn-primary"),
                         onsubmit="processRepo(event); return false;"
                     ),
@@ -345,31 +420,148 @@ def get():
 @rt('/process')
 async def post(request):
     form = await request.form()
-    repo_url = form.get('repo_url', '')
+    repo_url = form.get('repo_url', '').strip()
+    deadline = form.get('deadline', '').strip()
+    ref = form.get('ref', '').strip()
+    path = form.get('path', '').strip()
+    formats = form.get('formats', '').strip()
+    base = form.get('base', '').strip()
+    diffs = form.get('diffs', '').strip().lower() in ('1', 'true', 'on')
 
     if not repo_url:
         async def error_gen():
             yield "ERROR:Missing repository URL\n"
         return StreamingResponse(error_gen(), media_type="text/plain")
 
-    def run_worker():
-        """Run worker.py as subprocess using sync Popen (avoids asyncio issues)."""
-        worker_path = os.path.join(os.path.dirname(__file__), "worker.py")
-        
-        process = subprocess.Popen(
-            [sys.executable, worker_path, repo_url],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1  # Line buffered
+    if not is_allowed_target(repo_url):
+        async def error_gen():
+            yield "ERROR:Only GitHub repository URLs, and local repositories under LOCAL_REPO_ROOT, are allowed\n"
+        return StreamingResponse(error_gen(), media_type="text/plain")
+
+    try:
+        options = CrawlOptions(
+            ref=ref or None,
+            path=path,
+            deadline=float(deadline) if deadline else None,
+            formats=tuple(f.strip() for f in formats.split(',') if f.strip()) or ("txt",),
+            base=base or None,
+            diffs=diffs,
+            tenant=tenant_id(request)
         )
+    except ValueError:
+        async def error_gen():
+            yield "ERROR:Deadline must be a number of seconds\n"
+        return StreamingResponse(error_gen(), media_type="text/plain")
 
-        for line in iter(process.stdout.readline, ''):
-            yield line
+    async def run_job():
+        client = await get_client()
+        async for event in client.crawl(repo_url, options):
+            yield event.to_line()
 
-        process.wait()
+    return StreamingResponse(run_job(), media_type="text/plain")
 
-    return StreamingResponse(run_worker(), media_type="text/plain")
+@rt('/batch')
+async def post(request):
+    """
+    Crawl many repos on the shared client. Body: JSON {"repos": [...], "formats", "deadline",
+    "base", "diffs"} or a form with `repos` (one `<url> [ref] [path]` per line) and the /process fields.
+    Streams tagged job lines, ARTIFACT: per output, and DONE:<manifest>.
+    """
+    def error(message):
+        async def error_gen():
+            yield f"ERROR:{message}\n"
+        return StreamingResponse(error_gen(), media_type="text/plain")
+
+    try:
+        if request.headers.get('content-type', '').startswith('application/json'):
+            body = await request.json()
+            repos = body.get('repos', [])
+            entries = parse_batch(repos if isinstance(repos, str) else json.dumps(repos))
+            formats = body.get('formats', 'txt')
+            formats = formats.split(',') if isinstance(formats, str) else formats
+            deadline, base, diffs = body.get('deadline'), body.get('base'), bool(body.get('diffs'))
+        else:
+            form = await request.form()
+            entries = parse_batch(form.get('repos', ''))
+            formats = form.get('formats', 'txt').split(',')
+            deadline, base = form.get('deadline', '').strip(), form.get('base', '').strip()
+            diffs = form.get('diffs', '').strip().lower() in ('1', 'true', 'on')
+        options = CrawlOptions(
+            deadline=float(deadline) if deadline else None,
+            formats=tuple(f.strip() for f in formats if f.strip()) or ("txt",),
+            base=base or None,
+            diffs=diffs,
+            tenant=tenant_id(request)
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return error(f"Invalid batch request: {e}")
+
+    if not entries:
+        return error("No repositories given")
+    if len(entries) > BATCH_MAX_REPOS:
+        return error(f"At most {BATCH_MAX_REPOS} repositories per batch")
+    disallowed = [e.repo for e in entries if not is_allowed_target(e.repo)]
+    if disallowed:
+        return error(f"Only GitHub repository URLs, and local repositories under LOCAL_REPO_ROOT, are allowed: {', '.join(disallowed)}")
+
+    async def run_jobs():
+        client = await get_client()
+        async for entry, event in run_batch(client, entries, options, semaphore=_batch_slots):
+            if entry is None:
+                yield f"DONE:{os.path.basename(event)}\n"
+            else:
+                yield batch_line(entry, event)
+
+    return StreamingResponse(run_jobs(), media_type="text/plain")
+
+@rt('/query')
+async def get(request):
+    """
+    Build a custom context from the latest snapshot of an already crawled repo.
+    Params: repo (URL, owner/repo or local repository path; /tree/<ref>/<path> URLs pick
+    that subtree snapshot), ref, path, glob (repeatable), regex, budget (tokens).
+    """
+    from starlette.responses import PlainTextResponse
+    params = request.query_params
+    repo = params.get('repo', '')
+    if not repo:
+        return PlainTextResponse("ERROR:Missing repo parameter", status_code=400)
+
+    if not is_github_target(repo) and os.path.isdir(repo):
+        if not is_allowed_target(repo):
+            return PlainTextResponse("ERROR:Local repositories must be under LOCAL_REPO_ROOT", status_code=403)
+        key, ref, prefix = local_repo_key(repo), params.get('ref'), params.get('path', '').strip('/')
+        if ref or prefix:
+            # Local snapshots are stored per commit
+            try:
+                async with LocalGitSource(repo, ref or "HEAD", workers=0) as source:
+                    ref = source.commit
+            except SourceError as e:
+                return PlainTextResponse(f"ERROR:{e}", status_code=404)
+    else:
+        # owner/repo shorthand
+        if not is_github_target(repo):
+            repo = "github.com/" + repo
+        try:
+            repo, url_ref, url_path = parse_github_url(repo)
+        except ValueError as e:
+            return PlainTextResponse(f"ERROR:{e}", status_code=400)
+        key, ref, prefix = repo_key(repo), params.get('ref') or url_ref, (params.get('path') or url_path).strip('/')
+    snapshot = load_snapshot(key, ref, prefix=prefix)
+    if snapshot is None:
+        return PlainTextResponse("ERROR:No snapshot for this repo; process it first", status_code=404)
+
+    globs = [g for value in params.getlist('glob') for g in value.split(',') if g]
+    budget = params.get('budget')
+    try:
+        context = snapshot.build_context(
+            globs=globs or None,
+            pattern=params.get('regex') or None,
+            token_budget=int(budget) if budget else None
+        )
+    except (re.error, ValueError) as e:
+        return PlainTextResponse(f"ERROR:Invalid query: {e}", status_code=400)
+    return PlainTextResponse(context)
 
 # Static file serving
 @rt('/static/{filename}')
@@ -0,0 +1,289 @@
+"""
+Indexed repository snapshots.
+Every crawl leaves a snapshot behind so follow-up contexts can be built
+from it without crawling again:
+
+    snapshots/<owner>__<repo>/
+        LATEST[@<path prefix>]   scope most recently published for that subtree
+        .refs/<ref>[@<prefix>]   commit scope a branch or tag last resolved to
+        <commit>[@<path prefix>]/
+            CURRENT          name of the published generation directory
+            <generation>/
+                store.bin      file contents, concatenated (mmap-ed for reads)
+                index.json     path -> offset/length/token count, in fetch order
+                trigrams.json  optional trigram -> file ids, for content search
+
+Each writer fills its own generation directory and publishes it by
+atomically replacing CURRENT, so concurrent crawls of the same scope
+never clobber each other. Partial crawls (deadline, quota or failed
+fetches) never replace a complete snapshot.
+"""
+import os
+import re
+import json
+import mmap
+import shutil
+import fnmatch
+import tempfile
+import re._parser as sre_parse
+import re._constants as sre_constants
+from .config import SNAPSHOT_DIR, SNAPSHOT_TRIGRAMS
+from .utils import estimate_tokens, context_block
+
+def snapshot_scope(ref: str, prefix: str = "") -> str:
+    """Directory name for a snapshot of `ref`, optionally limited to a subtree."""
+    scope = ref.replace("/", "__")
+    if prefix:
+        scope += "@" + prefix.strip("/").replace("/", "__")
+    return scope
+
+def snapshot_path(repo: str, ref: str, root: str = SNAPSHOT_DIR, prefix: str = "") -> str:
+    """Directory holding the snapshot of `repo` (an owner__repo key) at `ref` and `prefix`."""
+    return os.path.join(root, repo, snapshot_scope(ref, prefix))
+
+def read_pointer(path: str) -> str | None:
+    """Contents of a LATEST or ref pointer file, or None if it was never written."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def trigrams(text: str) -> set:
+    """Lower-cased character trigrams of a string."""
+    text = text.lower()
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+def required_literals(pattern: str, flags: int = 0) -> list:
+    """
+    Literal substrings every match of `pattern` must contain.
+    Only runs of plain characters at the top level of the parsed pattern
+    count; groups, repeats, classes and alternations end a run, so the
+    result is conservative ([] means no prefilter).
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+    literals, run = [], []
+    for op, arg in parsed:
+        if op is sre_constants.LITERAL:
+            run.append(chr(arg))
+        else:
+            literals.append("".join(run))
+            run = []
+    literals.append("".join(run))
+    return [s for s in literals if len(s) >= 3]
+
+def write_atomic(path: str, text: str):
+    """Replace `path` with `text` through a unique temp file, safe against concurrent writers."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def current_generation(path: str) -> str | None:
+    """Directory of the published generation of the snapshot scope at `path`, or None."""
+    try:
+        with open(os.path.join(path, "CURRENT"), encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+def is_complete(generation: str) -> bool:
+    try:
+        with open(os.path.join(generation, "index.json"), encoding="utf-8") as f:
+            return json.load(f).get("complete", True)
+    except FileNotFoundError:
+        return False
+
+class SnapshotWriter:
+    """
+    Appends files to a new snapshot as they are fetched; `close()` publishes it.
+    `ref` should be a commit SHA; `alias` is the branch or tag it was resolved
+    from, which queries may use instead.
+    """
+
+    def __init__(self, repo: str, ref: str, root: str = SNAPSHOT_DIR, build_trigrams: bool = SNAPSHOT_TRIGRAMS,
+                 prefix: str = "", alias: str = None):
+        self.repo = repo
+        self.ref = ref
+        self.alias = alias if alias != ref else None
+        self.prefix = prefix
+        self.root = root
+        self.path = snapshot_path(repo, ref, root, prefix)
+        self.build_trigrams = build_trigrams
+        self.files = []
+        self.trigrams = {}
+        self.offset = 0
+        os.makedirs(self.path, exist_ok=True)
+        self.generation = tempfile.mkdtemp(dir=self.path, prefix="gen-")
+        self.published = False
+        self._store = open(os.path.join(self.generation, "store.bin"), "wb")
+
+    def add(self, path: str, content: str):
+        data = content.encode("utf-8")
+        self._store.write(data)
+        file_id = len(self.files)
+        self.files.append({
+            "path": path,
+            "offset": self.offset,
+            "length": len(data),
+            "tokens": estimate_tokens(content),
+        })
+        self.offset += len(data)
+        if self.build_trigrams:
+            for tri in trigrams(content):
+                self.trigrams.setdefault(tri, []).append(file_id)
+
+    def close(self, omitted: list = None) -> bool:
+        """
+        Flush the store and publish it as the snapshot of this ref, unless it is
+        partial (`omitted` paths) and a complete snapshot already exists.
+        Returns whether it was published.
+        """
+        self._store.close()
+        index = {"repo": self.repo, "ref": self.ref, "prefix": self.prefix, "files": self.files,
+                 "complete": not omitted, "omitted": omitted or []}
+        with open(os.path.join(self.generation, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        if self.build_trigrams:
+            with open(os.path.join(self.generation, "trigrams.json"), "w", encoding="utf-8") as f:
+                json.dump(self.trigrams, f)
+
+        previous = current_generation(self.path)
+        if omitted and previous and is_complete(previous):
+            shutil.rmtree(self.generation, ignore_errors=True)
+            return False
+        write_atomic(os.path.join(self.path, "CURRENT"), os.path.basename(self.generation))
+        self.published = True
+        scope = snapshot_scope(self.ref, self.prefix)
+        repo_dir = os.path.join(self.root, self.repo)
+        write_atomic(os.path.join(repo_dir, snapshot_scope("LATEST", self.prefix)), scope)
+        if self.alias:
+            os.makedirs(os.path.join(repo_dir, ".refs"), exist_ok=True)
+            write_atomic(os.path.join(repo_dir, ".refs", snapshot_scope(self.alias, self.prefix)), scope)
+        if previous and previous != self.generation:
+            # Open readers keep their mmap on POSIX; elsewhere the old generation lingers
+            shutil.rmtree(previous, ignore_errors=True)
+        return True
+
+    def abort(self):
+        """Drop an unpublished snapshot (the job was cancelled or failed)."""
+        if self.published:
+            return
+        self._store.close()
+        shutil.rmtree(self.generation, ignore_errors=True)
+
+class Snapshot:
+    """Read-only view of a snapshot; file contents are sliced out of an mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        self.repo = index["repo"]
+        self.ref = index["ref"]
+        self.prefix = index.get("prefix", "")
+        self.complete = index.get("complete", True)
+        self.omitted = index.get("omitted", [])
+        self.files = index["files"]
+        self.by_path = {entry["path"]: i for i, entry in enumerate(self.files)}
+
+        self.trigrams = None
+        trigram_file = os.path.join(path, "trigrams.json")
+        if os.path.exists(trigram_file):
+            with open(trigram_file, encoding="utf-8") as f:
+                self.trigrams = json.load(f)
+
+        self._file = open(os.path.join(path, "store.bin"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def read(self, file_id: int) -> str:
+        entry = self.files[file_id]
+        return self._mmap[entry["offset"]:entry["offset"] + entry["length"]].decode("utf-8")
+
+    def candidates(self, pattern: str, flags: int = 0) -> list:
+        """File ids that may match `pattern`, narrowed with the trigram index when possible."""
+        ids = set(range(len(self.files)))
+        if self.trigrams is None:
+            return sorted(ids)
+        for literal in required_literals(pattern, flags):
+            for tri in trigrams(literal):
+                ids &= set(self.trigrams.get(tri, ()))
+        return sorted(ids)
+
+    def query(self, globs: list = None, pattern: str = None, token_budget: int = None, flags: int = 0) -> list:
+        """
+        Select files by path globs (`src/api/**`), a content regex and a token budget.
+        Files keep their fetch (priority) order; ones that don't fit the budget are skipped.
+        Returns a list of (path, content) tuples.
+        """
+        if pattern:
+            regex = re.compile(pattern, flags)
+            ids = self.candidates(pattern, flags)
+        else:
+            regex = None
+            ids = range(len(self.files))
+
+        selected = []
+        used = 0
+        for file_id in ids:
+            entry = self.files[file_id]
+            if globs and not any(fnmatch.fnmatchcase(entry["path"], g) for g in globs):
+                continue
+            if token_budget is not None and used + entry["tokens"] > token_budget:
+                continue
+            content = self.read(file_id)
+            if regex and not regex.search(content):
+                continue
+            used += entry["tokens"]
+            selected.append((entry["path"], content))
+        return selected
+
+    def build_context(self, **query) -> str:
+        return "".join(context_block(path, content) for path, content in self.query(**query))
+
+    def close(self):
+        if self._mmap:
+            self._mmap.close()
+        self._file.close()
+
+# Open snapshots are reused across queries until a new generation is published
+_open_snapshots = {}
+
+def load_snapshot(repo: str, ref: str = None, root: str = SNAPSHOT_DIR, prefix: str = "") -> Snapshot | None:
+    """
+    Open the snapshot of `repo` at `ref` and `prefix`, or None. `ref` may be a
+    commit or a branch/tag that was crawled; without one, the most recently
+    crawled commit of that subtree is used.
+    """
+    repo_dir = os.path.join(root, repo)
+    if ref is None:
+        scope = read_pointer(os.path.join(repo_dir, snapshot_scope("LATEST", prefix)))
+    else:
+        scope = snapshot_scope(ref, prefix)
+        if not os.path.isdir(os.path.join(repo_dir, scope)):
+            scope = read_pointer(os.path.join(repo_dir, ".refs", scope))
+    if scope is None:
+        return None
+
+    path = os.path.join(repo_dir, scope)
+    cached = _open_snapshots.get(path)
+    # A concurrent publish can remove the generation between reading CURRENT and opening it
+    for _ in range(3):
+        generation = current_generation(path)
+        if generation is None:
+            return None
+        if cached and cached[0] == generation:
+            return cached[1]
+        try:
+            snapshot = Snapshot(generation)
+        except FileNotFoundError:
+            continue
+        if cached:
+            cached[1].close()
+        _open_snapshots[path] = (generation, snapshot)
+        return snapshot
+    return None
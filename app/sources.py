@@ -0,0 +1,390 @@
+"""
+Repository sources.
+A source lists the files of one repository at one ref and reads their
+contents, optionally limited to a subtree (path prefix); filtering,
+ordering and output are left to the pipeline.
+Sources are async context managers:
+
+    async with LocalGitSource("/srv/mirrors/repo.git", "main", "services/billing") as source:
+        ref, paths = await source.list_files()
+        results = await source.fetch_many(paths[:16])
+
+For delta jobs, `list_changes(base)` replaces `list_files()`: it returns
+the files added, modified or deleted between `base` and the source ref,
+and `fetch_many` then reads the head versions.
+"""
+import os
+import re
+import hashlib
+import asyncio
+from dataclasses import dataclass
+from contextlib import AsyncExitStack
+import httpx
+from .config import LOCAL_READ_WORKERS, BINARY_SNIFF_BYTES, GITHUB_API, COMPARE_MAX_FILES
+from .fetcher import RawFetcher, FetchResult
+from .utils import github_to_raw_url, parse_github_url, repo_key
+
+class SourceError(Exception):
+    """The source could not be opened or listed; the message is shown to the user."""
+
+@dataclass
+class Change:
+    status: str  # "A" added, "M" modified, "D" deleted; renames are a D plus an A
+    path: str
+
+@dataclass
+class ChangeSet:
+    base_commit: str
+    head_commit: str
+    changes: list
+    patches: dict = None  # path -> unified diff hunk text, when the source gets them for free
+
+def default_browser_config():
+    """Browser used to list repository pages."""
+    # Imported here so local-only jobs don't need a browser stack
+    from crawl4ai import BrowserConfig
+    return BrowserConfig(
+        headless=True,
+        verbose=False,
+        viewport_width=1280,
+        viewport_height=800,
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    )
+
+class GitHubSource:
+    """
+    Lists files from the GitHub repo page and fetches them from raw.githubusercontent.com.
+    Pass a shared `fetcher` and `browser` (async callable returning an
+    AsyncWebCrawler) to reuse pools across jobs; otherwise the source opens its own.
+    `job` is the fair scheduler job its fetches are queued under.
+    """
+
+    def __init__(self, repo_url: str, ref: str = None, prefix: str = "", fetcher: RawFetcher = None, browser=None,
+                 job=None):
+        # /tree/<ref>/<path> URLs scope the job to that ref and subtree
+        try:
+            repo_url, url_ref, url_prefix = parse_github_url(repo_url)
+        except ValueError as e:
+            raise SourceError(str(e))
+        self.repo_url = repo_url
+        self.ref = ref or url_ref
+        self.prefix = (prefix or url_prefix).strip("/")
+        self.list_url = repo_url
+        if self.ref or self.prefix:
+            # HEAD resolves to the default branch; blob links on the page carry its real name
+            self.list_url = f"{repo_url}/tree/{self.ref or 'HEAD'}/{self.prefix}".rstrip("/")
+        self.label = self.list_url
+        self.name = subtree_name(repo_url.split("/")[-1], self.prefix)
+        self.key = repo_key(repo_url)
+        self.fetcher = fetcher
+        self.job = job
+        self.commit = None
+        self._browser = browser
+        self._crawler = None
+        self._stack = None
+
+    async def __aenter__(self):
+        self._stack = AsyncExitStack()
+        if self.fetcher is None:
+            self.fetcher = await self._stack.enter_async_context(RawFetcher())
+        return self
+
+    async def _get_crawler(self):
+        # The browser is only needed to list the repo page, not for delta jobs
+        if self._browser is not None:
+            return await self._browser()
+        if self._crawler is None:
+            from crawl4ai import AsyncWebCrawler
+            self._crawler = await self._stack.enter_async_context(AsyncWebCrawler(config=default_browser_config()))
+        return self._crawler
+
+    async def __aexit__(self, *exc):
+        await self._stack.aclose()
+
+    async def list_files(self) -> tuple:
+        """Returns (ref, paths) from the blob links on the repository page."""
+        from crawl4ai import CrawlerRunConfig, CacheMode
+        crawler = await self._get_crawler()
+        list_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, page_timeout=30000)
+        result = await crawler.arun(url=self.list_url, config=list_config)
+        if not result.success:
+            raise SourceError(f"Failed to crawl repo: {result.error_message}")
+
+        refs = []
+        paths = set()
+        scope = self.prefix + "/" if self.prefix else ""
+        for link in result.links.get("internal", []):
+            href = link.get("href", "")
+            parts = href.split("/blob/")
+            if len(parts) > 1 and "/" in parts[1]:
+                ref, path = parts[1].split("/", 1)
+                if (self.ref and ref != self.ref) or not path.startswith(scope):
+                    continue
+                refs.append(ref)
+                paths.add(path)
+        if not paths:
+            raise SourceError("No files found. Is this a public repository?")
+        self.ref = self.ref or refs[0]
+        try:
+            # Files are read at one commit, so the snapshot matches it even if the branch moves
+            self.commit = await self.resolve(self.ref)
+        except SourceError:
+            self.commit = None  # API unavailable (e.g. rate limited): fall back to the ref name
+        return self.ref, sorted(paths)
+
+    @property
+    def snapshot_ref(self) -> str:
+        return self.commit or self.ref
+
+    async def fetch_many(self, paths: list) -> list:
+        urls = [github_to_raw_url(self.repo_url, f"{self.snapshot_ref}/{p}") for p in paths]
+        return await self.fetcher.fetch_many(urls, self.job)
+
+    def load_state(self) -> str:
+        """Rate limiter state, shown in job progress."""
+        return self.fetcher.limiter_state([github_to_raw_url(self.repo_url, ""), GITHUB_API])
+
+    async def _api(self, path: str, accept: str = "application/vnd.github+json") -> httpx.Response:
+        owner_repo = self.repo_url.replace("https://github.com/", "")
+        try:
+            response = await self.fetcher.get(f"{GITHUB_API}/repos/{owner_repo}/{path}", {"Accept": accept}, self.job)
+        except httpx.HTTPError as e:
+            raise SourceError(f"GitHub API request failed: {e}")
+        if response.status_code != 200:
+            raise SourceError(f"GitHub API {path.split('?')[0]} returned HTTP {response.status_code}")
+        return response
+
+    async def resolve(self, ref: str) -> str:
+        """Commit SHA for a branch, tag or SHA."""
+        response = await self._api(f"commits/{ref}", accept="application/vnd.github.sha")
+        return response.text.strip()
+
+    async def list_changes(self, base: str) -> ChangeSet:
+        """
+        Files changed between `base` and the source ref. Uses the compare API,
+        which lists at most COMPARE_MAX_FILES files (and only on its first
+        page); larger ranges fall back to diffing the two recursive trees.
+        """
+        if not self.ref:
+            raise SourceError("Delta jobs need a head ref (--ref or a /tree/<ref> URL).")
+        base_commit, head_commit = await asyncio.gather(self.resolve(base), self.resolve(self.ref))
+        # Head contents are read at the exact commit that was compared
+        self.ref = head_commit
+
+        changes, patches = [], {}
+        scope = self.prefix + "/" if self.prefix else ""
+        data = (await self._api(f"compare/{base_commit}...{head_commit}?per_page=1")).json()
+        files = data.get("files", [])
+        if len(files) >= COMPARE_MAX_FILES:
+            return ChangeSet(base_commit, head_commit, await self._tree_changes(base_commit, head_commit))
+        for f in files:
+            status, path = f["status"], f["filename"]
+            if status == "renamed" and f.get("previous_filename", "").startswith(scope):
+                changes.append(Change("D", f["previous_filename"]))
+            if not path.startswith(scope):
+                continue
+            if status == "removed":
+                changes.append(Change("D", path))
+            else:
+                changes.append(Change("A" if status in ("added", "renamed", "copied") else "M", path))
+                if f.get("patch"):
+                    patches[path] = f["patch"]
+        return ChangeSet(base_commit, head_commit, changes, patches)
+
+    async def _tree(self, commit: str) -> dict:
+        """path -> blob sha for every file under the prefix at `commit`."""
+        data = (await self._api(f"git/trees/{commit}?recursive=1")).json()
+        if data.get("truncated"):
+            raise SourceError(f"Tree of {commit[:12]} is too large for the GitHub API; use a local clone for this delta.")
+        scope = self.prefix + "/" if self.prefix else ""
+        return {e["path"]: e["sha"] for e in data.get("tree", [])
+                if e.get("type") == "blob" and e["path"].startswith(scope)}
+
+    async def _tree_changes(self, base_commit: str, head_commit: str) -> list:
+        """Complete change list from two trees (renames show up as delete + add, no patches)."""
+        base_tree, head_tree = await asyncio.gather(self._tree(base_commit), self._tree(head_commit))
+        changes = [Change("D", path) for path in sorted(base_tree.keys() - head_tree.keys())]
+        for path, sha in sorted(head_tree.items()):
+            if path not in base_tree:
+                changes.append(Change("A", path))
+            elif base_tree[path] != sha:
+                changes.append(Change("M", path))
+        return changes
+
+    async def diff(self, changeset: ChangeSet, paths: list) -> str:
+        """Unified diff for `paths`, assembled from the compare API patches."""
+        parts = []
+        for path in paths:
+            patch = (changeset.patches or {}).get(path)
+            if patch:
+                parts.append(f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n{patch}\n")
+            else:
+                parts.append(f"diff --git a/{path} b/{path}\n(diff not available from the compare API)\n")
+        return "".join(parts)
+
+class LocalGitSource:
+    """
+    Reads a local clone or bare repository at a ref without any network.
+    The tree comes from `git ls-tree`; blobs are streamed by a pool of
+    `git cat-file --batch` processes (git memory-maps the packfiles).
+    """
+
+    def __init__(self, path: str, ref: str = "HEAD", prefix: str = "", workers: int = LOCAL_READ_WORKERS):
+        self.path = os.path.abspath(path)
+        self.prefix = prefix.strip("/")
+        self.label = f"{self.path}@{ref}" + (f":{self.prefix}" if self.prefix else "")
+        repo_name = os.path.basename(self.path.rstrip(os.sep)).removesuffix(".git")
+        self.name = subtree_name(repo_name, self.prefix)
+        self.key = local_repo_key(self.path)
+        self.ref = ref
+        self.workers = workers
+        self.job = None  # local reads use their own reader pool, not fetch slots
+        self.commit = None
+        self.blobs = {}
+        self._readers = None
+        self._processes = []
+
+    async def _git(self, *args) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            "git", "-C", self.path, *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise SourceError(f"git {args[0]} failed: {stderr.decode(errors='replace').strip()}")
+        return stdout
+
+    async def __aenter__(self):
+        if not os.path.isdir(self.path):
+            raise SourceError(f"Local repository not found: {self.path}")
+        self.commit = (await self._git("rev-parse", "--verify", f"{self.ref}^{{commit}}")).decode().strip()
+        self._readers = asyncio.Queue()
+        self._processes = []
+        for _ in range(self.workers):
+            process = await asyncio.create_subprocess_exec(
+                "git", "-C", self.path, "cat-file", "--batch",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE
+            )
+            self._processes.append(process)
+            self._readers.put_nowait(process)
+        return self
+
+    async def __aexit__(self, *exc):
+        for process in self._processes:
+            if process.returncode is None:
+                process.stdin.close()
+            await process.wait()
+
+    async def list_files(self) -> tuple:
+        """Returns (ref, paths) of every regular file in the commit's tree."""
+        pathspec = ["--", self.prefix + "/"] if self.prefix else []
+        output = await self._git("ls-tree", "-r", "-z", "--full-tree", self.commit, *pathspec)
+        for entry in output.split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            mode, kind, sha = meta.split()
+            # Skip submodules (commit entries) and symlinks
+            if kind != b"blob" or mode == b"120000":
+                continue
+            self.blobs[path.decode("utf-8", errors="replace")] = sha.decode()
+        if not self.blobs:
+            raise SourceError(f"No files found at {self.ref}" + (f" under {self.prefix}/." if self.prefix else "."))
+        return self.ref, sorted(self.blobs)
+
+    @property
+    def snapshot_ref(self) -> str:
+        return self.commit
+
+    async def _read_blob(self, path: str) -> FetchResult:
+        process = await self._readers.get()
+        try:
+            process.stdin.write(self.blobs[path].encode() + b"\n")
+            await process.stdin.drain()
+            header = (await process.stdout.readline()).split()
+            if len(header) < 3 or header[1] != b"blob":
+                self._readers.put_nowait(process)
+                return FetchResult(path, False, error_message="missing blob")
+            data = await process.stdout.readexactly(int(header[2]) + 1)
+        except BaseException:
+            # Interrupted mid-object (e.g. deadline): the stream is out of sync, retire this reader
+            process.kill()
+            raise
+        self._readers.put_nowait(process)
+
+        data = data[:-1]
+        if b"\0" in data[:BINARY_SNIFF_BYTES]:
+            return FetchResult(path, False, error_message="binary file", skipped=True)
+        return FetchResult(path, True, data.decode("utf-8", errors="replace"))
+
+    async def fetch_many(self, paths: list) -> list:
+        return await asyncio.gather(*(self._read_blob(p) for p in paths))
+
+    def load_state(self) -> str:
+        return f"{self.workers} local blob readers"
+
+    async def list_changes(self, base: str) -> ChangeSet:
+        """Files changed between `base` and the source ref, from `git diff --raw`."""
+        base_commit = (await self._git("rev-parse", "--verify", f"{base}^{{commit}}")).decode().strip()
+        pathspec = ["--", self.prefix + "/"] if self.prefix else []
+        output = await self._git("diff", "--raw", "-z", "--no-abbrev", "-M", base_commit, self.commit, *pathspec)
+
+        changes = []
+        fields = output.split(b"\0")
+        i = 0
+        while i < len(fields) and fields[i]:
+            # ":<old mode> <new mode> <old sha> <new sha> <status>" then one or two paths
+            _, new_mode, _, new_sha, status = fields[i][1:].decode().split()
+            status = status[0]
+            if status in "RC":
+                old_path, path = fields[i + 1].decode(), fields[i + 2].decode()
+                i += 3
+                if status == "R":
+                    changes.append(Change("D", old_path))
+                status = "A"
+            else:
+                path = fields[i + 1].decode()
+                i += 2
+            if status == "D":
+                changes.append(Change("D", path))
+            elif new_mode not in ("120000", "160000"):
+                self.blobs[path] = new_sha
+                changes.append(Change("A" if status == "A" else "M", path))
+        return ChangeSet(base_commit, self.commit, changes)
+
+    async def diff(self, changeset: ChangeSet, paths: list) -> str:
+        """Unified diff for `paths` between the two commits."""
+        if not paths:
+            return ""
+        output = await self._git("diff", "--no-color", changeset.base_commit, changeset.head_commit, "--", *paths)
+        return output.decode("utf-8", errors="replace")
+
+def subtree_name(repo_name: str, prefix: str) -> str:
+    """Output name for a job, e.g. monorepo + services/billing -> monorepo_services_billing."""
+    return "_".join([repo_name, *prefix.split("/")]) if prefix else repo_name
+
+def local_repo_key(path: str) -> str:
+    """
+    Snapshot key of a local repository, e.g. /srv/mirrors/repo.git ->
+    local__repo_1a2b3c4d. The hash of the real path keeps same-named
+    checkouts in different directories apart.
+    """
+    real_path = os.path.realpath(path)
+    repo_name = os.path.basename(real_path.rstrip(os.sep)).removesuffix(".git")
+    digest = hashlib.sha1(real_path.encode("utf-8", "surrogateescape")).hexdigest()[:8]
+    return f"local__{repo_name}_{digest}"
+
+def is_github_target(target: str) -> bool:
+    """
+    URLs and github.com/... targets; paths such as /srv/mirrors/github.com/org/repo are local.
+    Non-GitHub URLs count too, so GitHubSource can reject them instead of treating them as paths.
+    """
+    return re.match(r"(?i)^(?:https?://|(?:www\.)?github\.com/)", target) is not None
+
+def open_source(target: str, ref: str = None, prefix: str = "", fetcher: RawFetcher = None, browser=None, job=None):
+    """Pick the source for a job target: a GitHub URL or a local repository path."""
+    if is_github_target(target):
+        return GitHubSource(target, ref, prefix, fetcher=fetcher, browser=browser, job=job)
+    return LocalGitSource(target, ref or "HEAD", prefix)
@@ -1,5 +1,9 @@
 import os
-from .config import IGNORE_EXTENSIONS, IGNORE_FILES, IGNORE_DIRS
+import re
+from .config import (
+    IGNORE_EXTENSIONS, IGNORE_FILES, IGNORE_DIRS,
+    DOC_DIRS, DOC_EXTENSIONS, MANIFEST_FILES, ENTRY_POINT_FILES, LOW_PRIORITY_DIRS
+)
 
 def is_useful_file(path: str) -> bool:
     """Check if a file should be included in the LLM context."""
@@ -15,6 +19,29 @@ def is_useful_file(path: str) -> bool:
     if ext in IGNORE_EXTENSIONS: return False
     return True
 
+GITHUB_URL = re.compile(r"^(?:https?://)?(?:www\.)?github\.com/([^/\s]+)/([^/\s]+)(/.*)?$", re.IGNORECASE)
+
+def parse_github_url(url: str) -> tuple:
+    """
+    Splits a GitHub URL into (repo_url, ref, path), with repo_url normalized to https://github.com/<owner>/<repo>.
+    https://github.com/org/mono/tree/main/services/billing -> (https://github.com/org/mono, main, services/billing)
+    github.com/org/mono.git and http://www.github.com/org/mono give (https://github.com/org/mono, None, "").
+    Blob URLs are scoped to the file's directory. Raises ValueError for anything that is not a GitHub repo URL.
+    Refs containing "/" are not supported (the first segment is taken as the ref).
+    """
+    match = GITHUB_URL.match(url.strip().rstrip("/"))
+    if not match:
+        raise ValueError(f"Not a GitHub repository URL: {url}")
+    owner, name, rest = match.groups()
+    repo_url = f"https://github.com/{owner}/{name.removesuffix('.git')}"
+    for marker in ("/tree/", "/blob/"):
+        if (rest or "").startswith(marker):
+            ref, _, path = rest[len(marker):].partition("/")
+            if marker == "/blob/":
+                path = path.rpartition("/")[0]
+            return repo_url, ref, path
+    return repo_url, None, ""
+
 def github_to_raw_url(repo_url: str, file_path: str) -> str:
     """
     Converts a GitHub blob URL to a raw content URL.
@@ -25,3 +52,58 @@ def github_to_raw_url(repo_url: str, file_path: str) -> str:
     # This assumes standard GitHub URL structure
     raw_base = repo_url.replace("github.com", "raw.githubusercontent.com").replace("/blob/", "/")
     return f"{raw_base}/{file_path}"
+
+def is_test_file(name: str) -> bool:
+    """Check if a file name follows a common test naming convention."""
+    stem, ext = os.path.splitext(name)
+    return (
+        stem.startswith('test_') or stem.endswith('_test')
+        or stem.endswith('.test') or stem.endswith('.spec')
+        or name == 'conftest.py'
+    )
+
+def file_priority(path: str) -> tuple:
+    """
+    Sort key that puts the files most useful to an LLM first.
+    Tiers: README, package manifests, entry points, docs, core source
+    (shallowest first), then tests, fixtures and vendored code. Manifests
+    and entry points are checked before docs, so requirements.txt is a
+    manifest and CHANGELOG.md does not come before pyproject.toml.
+    """
+    parts = path.split('/')
+    name = parts[-1]
+    dirs = set(parts[:-1])
+    ext = os.path.splitext(name)[1].lower()
+    depth = len(parts) - 1
+
+    if dirs & LOW_PRIORITY_DIRS or is_test_file(name):
+        tier = 5
+    elif name.lower().startswith('readme'):
+        tier = 0
+    elif name in MANIFEST_FILES:
+        tier = 1
+    elif name in ENTRY_POINT_FILES:
+        tier = 2
+    elif dirs & DOC_DIRS or ext in DOC_EXTENSIONS:
+        tier = 3
+    else:
+        tier = 4
+    return (tier, depth, path.lower())
+
+def omitted_files_block(paths: list, reason: str) -> str:
+    """Build the trailer listing files that were left out of a partial context."""
+    listing = "\n".join(paths)
+    return f"\n\n--- OMITTED FILES ({reason}) ---\n{listing}\n--- END OF OMITTED FILES ---"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for context budgets."""
+    return (len(text) + 3) // 4
+
+def repo_key(repo_url: str) -> str:
+    """Filesystem-safe key for a repository, e.g. https://github.com/user/repo -> user__repo."""
+    parts = repo_url.rstrip("/").replace("https://github.com/", "").split("/")
+    return "__".join(parts[:2])
+
+def context_block(path: str, content: str) -> str:
+    """Wrap a file in the START/END markers used by context files."""
+    return f"\n\n--- START OF FILE: {path} ---\n{content}\n--- END OF FILE: {path} ---"
@@ -0,0 +1,186 @@
+"""
+Context output writers.
+Every writer is fed files as they arrive, so outputs are built
+incrementally instead of in memory:
+
+    txt      the classic START/END marked context file
+    jsonl    one JSON record per file
+    parquet  columnar records, one row group per ARROW_BATCH_ROWS files
+    arrow    Arrow IPC file, memory-mappable for zero-copy reads
+
+Structured records carry path, language, size, lines, sha256, tokens and content.
+Parquet and Arrow need the optional `pyarrow` package.
+
+Writers fill a unique temp file next to the output and `close()` moves it
+into place, so concurrent jobs for the same repo never interleave and an
+aborted job (`abort()`) leaves the previous artifact untouched.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from .config import OUTPUT_DIR, OUTPUT_FORMATS, ARROW_BATCH_ROWS, LANGUAGE_EXTENSIONS, LANGUAGE_FILES
+from .utils import context_block, estimate_tokens
+
+def detect_language(path: str) -> str:
+    name = os.path.basename(path)
+    if name in LANGUAGE_FILES:
+        return LANGUAGE_FILES[name]
+    return LANGUAGE_EXTENSIONS.get(os.path.splitext(name)[1].lower(), "")
+
+def count_lines(content: str) -> int:
+    return content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+
+def file_record(path: str, content: str) -> dict:
+    """Structured record for one file."""
+    data = content.encode("utf-8")
+    return {
+        "path": path,
+        "language": detect_language(path),
+        "size": len(data),
+        "lines": count_lines(content),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "tokens": estimate_tokens(content),
+        "content": content,
+    }
+
+def temp_path(filepath: str) -> str:
+    """A new, unique temp file in the directory of `filepath`."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filepath) or ".", prefix=".tmp-",
+                               suffix="-" + os.path.basename(filepath))
+    os.close(fd)
+    return tmp
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class TextWriter:
+    extension = "txt"
+
+    def __init__(self, filepath: str, ref: str = None):
+        self.filepath = filepath
+        self.ref = ref
+        self._tmp = temp_path(filepath)
+        self._file = open(self._tmp, "w", encoding="utf-8")
+
+    def add(self, path: str, content: str):
+        # Marker paths keep the "<ref>/<path>" form of the original context files
+        self._file.write(context_block(f"{self.ref}/{path}" if self.ref else path, content))
+
+    def note(self, block: str):
+        """Append a non-file block, e.g. the OMITTED FILES trailer."""
+        self._file.write(block)
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.filepath)
+
+    def abort(self):
+        self._file.close()
+        discard(self._tmp)
+
+class JsonlWriter:
+    extension = "jsonl"
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._tmp = temp_path(filepath)
+        self._file = open(self._tmp, "w", encoding="utf-8")
+
+    def add(self, path: str, content: str):
+        self._file.write(json.dumps(file_record(path, content), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def note(self, block: str):
+        pass
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.filepath)
+
+    def abort(self):
+        self._file.close()
+        discard(self._tmp)
+
+class ArrowWriter:
+    """Writes Parquet (`kind="parquet"`) or Arrow IPC (`kind="arrow"`) in record batches."""
+
+    def __init__(self, filepath: str, kind: str = "parquet"):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError(f"{kind} output needs pyarrow (uv pip install pyarrow)")
+        self.pa = pa
+        self.filepath = filepath
+        self.extension = kind
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("language", pa.string()),
+            ("size", pa.int64()),
+            ("lines", pa.int64()),
+            ("sha256", pa.string()),
+            ("tokens", pa.int64()),
+            ("content", pa.large_string()),
+        ])
+        self._tmp = temp_path(filepath)
+        try:
+            if kind == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._tmp, self.schema)
+            else:
+                self._writer = pa.ipc.new_file(self._tmp, self.schema)
+        except Exception:
+            discard(self._tmp)
+            raise
+        self._rows = []
+
+    def add(self, path: str, content: str):
+        self._rows.append(file_record(path, content))
+        if len(self._rows) >= ARROW_BATCH_ROWS:
+            self._flush()
+
+    def note(self, block: str):
+        pass
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_batch(self.pa.RecordBatch.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self._tmp, self.filepath)
+
+    def abort(self):
+        try:
+            self._writer.close()
+        except Exception:
+            pass  # already closed, or the file is being thrown away anyway
+        finally:
+            discard(self._tmp)
+
+def open_writers(name: str, formats: list, ref: str = None, directory: str = OUTPUT_DIR) -> list:
+    """Open one writer per requested format for `llm_context_<name>.<ext>`; the first is the primary output."""
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)}")
+    os.makedirs(directory, exist_ok=True)
+    writers = []
+    try:
+        for fmt in dict.fromkeys(formats):
+            filepath = os.path.join(directory, f"llm_context_{name}.{fmt}")
+            if fmt == "txt":
+                writers.append(TextWriter(filepath, ref))
+            elif fmt == "jsonl":
+                writers.append(JsonlWriter(filepath))
+            else:
+                writers.append(ArrowWriter(filepath, fmt))
+    except Exception:
+        for writer in writers:
+            writer.abort()
+        raise
+    return writers
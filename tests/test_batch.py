@@ -0,0 +1,93 @@
+import json
+import asyncio
+from app.batch import BatchEntry, parse_batch, assign_names, run_batch
+from app.client import CrawlClient, CrawlOptions
+from app.fetcher import FetchResult
+from app.sources import SourceError
+
+class StubSource:
+    """In-memory source; repos named broken* fail to list, files named bad_* fail to fetch."""
+    prefix = ""
+    job = None
+
+    def __init__(self, repo, options):
+        self.label = self.name = repo.rsplit("/", 1)[-1] + (f"_{options.ref}" if options.ref else "")
+        self.key = f"local__{self.name}"
+        self.ref = self.snapshot_ref = "c0ffee"
+        self.broken = self.name.startswith("broken")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def list_files(self):
+        if self.broken:
+            raise SourceError("No files found. Is this a public repository?")
+        return self.ref, ["README.md", "main.py", "bad_util.py"]
+
+    async def fetch_many(self, paths):
+        await asyncio.sleep(0.01)
+        return [FetchResult(p, False, error_message="HTTP 500") if p.startswith("bad_") else FetchResult(p, True, f"# {p}\n")
+                for p in paths]
+
+    def load_state(self):
+        return ""
+
+def test_parse_batch_lines():
+    entries = parse_batch("""
+        # monorepo subtrees
+        https://github.com/org/mono main services/api
+        https://github.com/org/mono   # trailing comment
+        /srv/repos/tool v2
+    """)
+    assert [(e.repo, e.ref, e.path) for e in entries] == [
+        ("https://github.com/org/mono", "main", "services/api"),
+        ("https://github.com/org/mono", None, ""),
+        ("/srv/repos/tool", "v2", ""),
+    ]
+
+def test_parse_batch_json():
+    text = json.dumps(["https://github.com/org/a dev", {"repo": "https://github.com/org/b", "path": "lib", "base": "v1"}])
+    entries = parse_batch(text)
+    assert [(e.repo, e.ref, e.path, e.base) for e in entries] == [
+        ("https://github.com/org/a", "dev", "", None),
+        ("https://github.com/org/b", None, "lib", "v1"),
+    ]
+
+def test_assign_names_only_renames_colliding_outputs():
+    entries = [
+        BatchEntry("https://github.com/org/mono", "main"),
+        BatchEntry("https://github.com/org/mono", "release/1.0"),
+        BatchEntry("https://github.com/org/mono", "main", "services/api"),
+        BatchEntry("https://github.com/org/mono", base="v1"),
+        BatchEntry("https://gitlab.com/org/other"),
+    ]
+    assign_names(entries)
+    assert [e.name for e in entries] == ["mono_main_0", "mono_release_1.0_1", None, None, None]
+
+def test_run_batch_writes_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = [BatchEntry("org/good"), BatchEntry("org/broken"), BatchEntry("org/good", "dev")]
+
+    async def main():
+        async with CrawlClient(output_dir=str(tmp_path / "out")) as client:
+            client.open_source = lambda repo, options, job=None: StubSource(repo, options)
+            return [item async for item in run_batch(client, entries, CrawlOptions(), concurrency=2)]
+
+    items = asyncio.run(main())
+    assert items[-1][0] is None
+    with open(items[-1][1], encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["concurrency"] == 2 and manifest["formats"] == ["txt"]
+    assert (manifest["succeeded"], manifest["failed"]) == (2, 1)
+    good, broken, dev = manifest["jobs"]
+    assert good["status"] == dev["status"] == "partial"
+    assert good["files"] == 2 and good["failed_files"] == ["c0ffee/bad_util.py"]
+    # Same repo twice: assign_names keeps their outputs apart
+    assert good["artifacts"] == ["llm_context_good_default_0.txt"]
+    assert dev["artifacts"] == ["llm_context_good_dev_1.txt"]
+    assert broken["status"] == "failed" and "No files found" in broken["error"]
+    assert all(job["elapsed"] > 0 and job["queued"] >= 0 for job in manifest["jobs"])
+    assert manifest["job_seconds"] >= max(job["elapsed"] for job in manifest["jobs"])
@@ -0,0 +1,128 @@
+import asyncio
+from app.client import CrawlClient, CrawlOptions
+from app.events import Done, Error, Fetched
+from app.fetcher import FetchResult
+from app.sources import Change, ChangeSet
+
+class SlowSource:
+    """In-memory source: files named slow_* never finish before the deadline."""
+    label = name = "demo"
+    key = "local__demo"
+    prefix = ""
+    job = None
+    ref = snapshot_ref = "c0ffee"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def list_files(self):
+        return self.ref, ["README.md", "slow_a.py", "b.py", "slow_c.py", "d.py"]
+
+    async def fetch_many(self, paths):
+        results = []
+        for path in paths:
+            await asyncio.sleep(10 if path.startswith("slow_") else 0)
+            results.append(FetchResult(path, True, f"# {path}\n"))
+        return results
+
+    def load_state(self):
+        return ""
+
+def test_deadline_keeps_files_finished_in_the_same_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def main():
+        async with CrawlClient(output_dir=str(tmp_path)) as client:
+            client.open_source = lambda repo, options, job=None: SlowSource()
+            return [e async for e in client.crawl("demo", CrawlOptions(deadline=0.5))]
+
+    events = asyncio.run(main())
+    done = events[-1]
+    assert isinstance(done, Done)
+    assert sorted(e.path for e in events if isinstance(e, Fetched)) == ["c0ffee/README.md", "c0ffee/b.py", "c0ffee/d.py"]
+    assert sorted(done.omitted) == ["c0ffee/slow_a.py", "c0ffee/slow_c.py"]
+    text = (tmp_path / done.artifact).read_text()
+    assert "b.py" in text and "OMITTED" in text
+
+def test_abandoned_crawl_keeps_previous_outputs_and_leaves_no_temp_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def crawl(stop_early: bool):
+        async with CrawlClient(output_dir=str(tmp_path / "out")) as client:
+            client.open_source = lambda repo, options, job=None: SlowSource()
+            crawl = client.crawl("demo", CrawlOptions(deadline=0.2, formats=("txt", "jsonl")))
+            async for event in crawl:
+                if stop_early and isinstance(event, Fetched):
+                    await crawl.aclose()
+                    break
+
+    asyncio.run(crawl(False))
+    before = (tmp_path / "out" / "llm_context_demo.txt").read_text()
+    asyncio.run(crawl(True))
+    assert (tmp_path / "out" / "llm_context_demo.txt").read_text() == before
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["llm_context_demo.jsonl", "llm_context_demo.txt"]
+    scope = tmp_path / "snapshots" / "local__demo" / "c0ffee"
+    assert sorted(p.name for p in scope.iterdir() if p.name.startswith("gen-")) == [
+        (scope / "CURRENT").read_text().strip()]
+
+def test_source_timeout_without_deadline_is_reported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    class TimingOutSource(SlowSource):
+        async def list_files(self):
+            raise asyncio.TimeoutError()
+
+    async def main():
+        async with CrawlClient(output_dir=str(tmp_path)) as client:
+            client.open_source = lambda repo, options, job=None: TimingOutSource()
+            return [e async for e in client.crawl("demo", CrawlOptions())]
+
+    error = asyncio.run(main())[-1]
+    assert isinstance(error, Error) and error.message == "Timed out fetching the file list from demo."
+
+def test_local_jobs_do_not_take_a_scheduler_share(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def main():
+        async with CrawlClient(output_dir=str(tmp_path)) as client:
+            client.open_source = lambda repo, options, job=None: SlowSource()
+            remote = client.scheduler.open_job("default")
+            crawl = client.crawl(str(tmp_path), CrawlOptions(deadline=0.2))
+            jobs = []
+            async for event in crawl:
+                jobs.append(len(client.scheduler.tenants["default"].jobs))
+            return jobs, remote.share()
+
+    jobs, share = asyncio.run(main())
+    assert set(jobs) == {1}
+    assert share == 1.0
+
+class SlowDeltaSource(SlowSource):
+    async def list_changes(self, base):
+        changes = [Change("M", "README.md"), Change("A", "slow_a.py"), Change("M", "b.py"), Change("D", "gone.py")]
+        return ChangeSet("base0000", "head1111", changes)
+
+def run_delta(tmp_path, options):
+    async def main():
+        async with CrawlClient(output_dir=str(tmp_path / "out")) as client:
+            client.open_source = lambda repo, options, job=None: SlowDeltaSource()
+            return [e async for e in client.crawl("demo", options)]
+    return asyncio.run(main())
+
+def test_delta_honours_the_deadline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    done = run_delta(tmp_path, CrawlOptions(base="base0000", deadline=0.5))[-1]
+    assert isinstance(done, Done) and done.files == 2
+    assert done.omitted == ["slow_a.py"]
+    text = (tmp_path / "out" / done.artifact).read_text()
+    assert "b.py" in text and "OMITTED" in text and "gone.py" in text
+    # Partial deltas are not cached: the next run fetches again
+    assert not run_delta(tmp_path, CrawlOptions(base="base0000", deadline=0.5))[-1].cached
+
+def test_delta_rejects_structured_formats(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    error = run_delta(tmp_path, CrawlOptions(base="base0000", formats=("txt", "jsonl")))[-1]
+    assert isinstance(error, Error) and "jsonl" in error.message
@@ -0,0 +1,52 @@
+import time
+import asyncio
+import httpx
+from app.ratelimit import AuthPool, HostLimiter
+
+def run_requests(limiter: HostLimiter, handler, count: int) -> list:
+    """Send `count` sequential GETs through `limiter`; returns the bearer token each attempt used."""
+    seen = []
+
+    def record(request):
+        seen.append(request.headers.get("authorization", "").removeprefix("Bearer "))
+        return handler(request)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(record)) as client:
+            for _ in range(count):
+                await limiter.request(client, "GET", "https://api.example.com/x")
+
+    asyncio.run(main())
+    return seen
+
+def test_requests_rotate_across_all_tokens():
+    limiter = HostLimiter("api.example.com", 1000.0, 1000, ["t1", "t2", "t3", "t4"])
+    seen = run_requests(limiter, lambda r: httpx.Response(200), 8)
+    assert seen == ["t1", "t2", "t3", "t4"] * 2
+
+def test_rotation_with_two_tokens_uses_both():
+    limiter = HostLimiter("api.example.com", 1000.0, 1000, ["t1", "t2"])
+    assert run_requests(limiter, lambda r: httpx.Response(200), 4) == ["t1", "t2", "t1", "t2"]
+
+def test_throttled_token_is_parked_and_request_retried():
+    reset = str(int(time.time()) + 3600)
+
+    def handler(request):
+        if request.headers["authorization"] == "Bearer t1":
+            return httpx.Response(403, headers={"x-ratelimit-remaining": "0", "x-ratelimit-reset": reset})
+        return httpx.Response(200, headers={"x-ratelimit-remaining": "100"})
+
+    limiter = HostLimiter("api.example.com", 1000.0, 1000, ["t1", "t2", "t3"])
+    seen = run_requests(limiter, handler, 4)
+    assert seen == ["t1", "t2", "t3", "t2", "t3"]
+    assert limiter.throttled == 1 and limiter.retries == 1
+    assert not limiter.auth.usable("t1")
+
+def test_exhausted_does_not_advance_rotation():
+    pool = AuthPool(["t1", "t2", "t3"])
+    for _ in range(5):
+        assert not pool.exhausted()
+    assert [pool.choose() for _ in range(3)] == ["t1", "t2", "t3"]
+    for token in pool.tokens:
+        pool.update(token, 0, time.time() + 60)
+    assert pool.exhausted() and pool.choose() is None
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import httpx
+from app.fetcher import RawFetcher
+from app.scheduler import FairScheduler, sjf_boost
+
+def grant_order(scheduler: FairScheduler, requests: list) -> list:
+    """Queue (job, label) requests behind a held slot, then release it; returns labels in grant order."""
+    order = []
+
+    async def one(job, label):
+        async with scheduler.slot(job):
+            order.append(label)
+            await asyncio.sleep(0)
+
+    async def main():
+        blocker = scheduler.slot()
+        await blocker.__aenter__()
+        tasks = [asyncio.create_task(one(job, label)) for job, label in requests]
+        await asyncio.sleep(0)
+        await blocker.__aexit__(None, None, None)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order
+
+def test_equal_tenants_alternate():
+    scheduler = FairScheduler(1)
+    a, b = scheduler.open_job("a"), scheduler.open_job("b")
+    order = grant_order(scheduler, [(a, "a")] * 4 + [(b, "b")] * 4)
+    assert order == ["a", "b"] * 4
+
+def test_tenant_weights_set_the_share():
+    scheduler = FairScheduler(1, tenant_weights={"heavy": 3.0})
+    heavy, light = scheduler.open_job("heavy"), scheduler.open_job("light")
+    order = grant_order(scheduler, [(heavy, "h")] * 6 + [(light, "l")] * 2)
+    assert order[:4].count("h") == 3 and order[:4].count("l") == 1
+
+def test_tenant_share_is_split_across_its_jobs():
+    scheduler = FairScheduler(1)
+    a1, a2, b = scheduler.open_job("a"), scheduler.open_job("a"), scheduler.open_job("b")
+    order = grant_order(scheduler, [(a1, "a")] * 4 + [(a2, "a")] * 4 + [(b, "b")] * 4)
+    assert order[:8].count("b") == 4
+
+def test_small_jobs_are_boosted():
+    scheduler = FairScheduler(1)
+    big, small = scheduler.open_job("big"), scheduler.open_job("small")
+    big.remaining, small.remaining = 50_000, 10
+    assert sjf_boost(small.remaining) > sjf_boost(big.remaining) == 1.0
+    order = grant_order(scheduler, [(big, "big")] * 8 + [(small, "small")] * 4)
+    assert order.index("big", 1) > max(i for i, label in enumerate(order) if label == "small")
+
+def test_tenant_cap_applies_only_while_others_wait():
+    scheduler = FairScheduler(4, tenant_max_concurrency=2)
+    a, b = scheduler.open_job("a"), scheduler.open_job("b")
+    peak = {"a": 0}
+
+    async def one(job):
+        async with scheduler.slot(job):
+            if job is a and b.active + len([e for e in scheduler._queue if e[3] is b]):
+                peak["a"] = max(peak["a"], a.active)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(one(a) for _ in range(8)), *(one(b) for _ in range(8)))
+        alone = [asyncio.create_task(one(a)) for _ in range(4)]
+        await asyncio.sleep(0)
+        assert a.active == 4  # idle slots are lent out when nobody else is waiting
+        await asyncio.gather(*alone)
+
+    asyncio.run(main())
+    assert peak["a"] <= 2
+
+def test_cancelled_waiters_release_nothing_and_leak_nothing():
+    scheduler = FairScheduler(1)
+    job = scheduler.open_job("a")
+
+    async def main():
+        blocker = scheduler.slot(job)
+        await blocker.__aenter__()
+
+        async def wait():
+            async with scheduler.slot(job):
+                pass
+
+        waiting = [asyncio.create_task(wait()) for _ in range(3)]
+        await asyncio.sleep(0)
+        waiting[0].cancel()
+        await asyncio.gather(waiting[0], return_exceptions=True)
+        # Granted on release but cancelled before it ran: the slot must be handed on
+        await blocker.__aexit__(None, None, None)
+        waiting[1].cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        assert waiting[2].done() and not waiting[2].cancelled()
+        assert scheduler.active == 0 and job.active == 0 and job.tenant.active == 0
+        async with scheduler.slot(job):
+            assert scheduler.active == 1
+
+    # A leaked slot would deadlock the waiters instead of failing
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+def test_retry_backoff_does_not_hold_a_slot():
+    def handler(request):
+        if request.url.host == "throttled.example.test":
+            return httpx.Response(503, headers={"Retry-After": "1"})
+        return httpx.Response(200, text="ok")
+
+    async def main():
+        fetcher = RawFetcher(concurrency=1)
+        async with fetcher:
+            fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            a, b = fetcher.scheduler.open_job("a"), fetcher.scheduler.open_job("b")
+            throttled = asyncio.create_task(fetcher.get("https://throttled.example.test/x", job=a))
+            await asyncio.sleep(0.1)  # a's first attempt failed and is backing off
+            started = time.monotonic()
+            response = await asyncio.wait_for(fetcher.get("https://open.example.test/y", job=b), timeout=5)
+            waited = time.monotonic() - started
+            throttled.cancel()
+            await fetcher.client.aclose()
+            return response.status_code, waited, fetcher.scheduler.active
+
+    status, waited, active = asyncio.run(main())
+    assert status == 200 and waited < 0.5
+    assert active == 0
@@ -0,0 +1,60 @@
+import re
+import pytest
+from app.snapshot import SnapshotWriter, load_snapshot, required_literals
+
+FILES = {
+    "README.md": "# Demo\nprint the docs\n",
+    "app/main.py": "def handler(request):\n    print(request)\n",
+    "app/util.py": "foobar = 1\nxyz = abcd\n",
+    "app/other.py": "abfgh and cdefgh\nfoo.bar()\n",
+    "tests/test_main.py": "def test_handler():\n    assert True\n",
+}
+
+PATTERNS = [
+    "print", "(?:print)", "(nope)?print", "(?:foo)bar", "(abcd)?xyz", "ab(cde)*fgh",
+    r"foo\.bar", "def handler", "handler|nothing", "abc[de]fgh", "x{3}yzw", "(?i)PRINT",
+    r"print\(request", "abcd?e", "missing_literal",
+]
+
+@pytest.fixture
+def snapshot(tmp_path):
+    writer = SnapshotWriter("owner__repo", "main", root=str(tmp_path))
+    for path, content in FILES.items():
+        writer.add(path, content)
+    writer.close()
+    return load_snapshot("owner__repo", "main", root=str(tmp_path))
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_prefilter_matches_full_scan(snapshot, pattern):
+    expected = [path for path, content in FILES.items() if re.search(pattern, content)]
+    assert [path for path, _ in snapshot.query(pattern=pattern)] == expected
+
+def test_required_literals_skip_optional_groups():
+    assert required_literals("(?:foo)bar") == ["foobar"]
+    assert required_literals("(abcd)?xyz") == ["xyz"]
+    assert required_literals("ab(cde)*fgh") == ["fgh"]
+    assert required_literals("a|bcdef") == []
+    assert required_literals("(") == []
+
+def publish(root, ref, files, prefix="", alias=None):
+    writer = SnapshotWriter("owner__repo", ref, root=str(root), prefix=prefix, alias=alias)
+    for path, content in files.items():
+        writer.add(path, content)
+    writer.close()
+
+def test_latest_snapshot_is_chosen_per_subtree(tmp_path):
+    publish(tmp_path, "c1", {"services/api/app.py": "api"}, prefix="services/api")
+    publish(tmp_path, "c2", {"services/web/app.py": "web"}, prefix="services/web")
+    api = load_snapshot("owner__repo", root=str(tmp_path), prefix="services/api")
+    assert [path for path, _ in api.query()] == ["services/api/app.py"]
+    assert load_snapshot("owner__repo", root=str(tmp_path), prefix="services/billing") is None
+    assert load_snapshot("owner__repo", root=str(tmp_path)) is None  # no whole-repo crawl yet
+
+def test_branch_alias_points_at_crawled_commit(tmp_path):
+    publish(tmp_path, "aaa111", {"a.py": "old"}, alias="main")
+    publish(tmp_path, "bbb222", {"a.py": "new"}, alias="main")
+    assert load_snapshot("owner__repo", "main", root=str(tmp_path)).read(0) == "new"
+    assert load_snapshot("owner__repo", "aaa111", root=str(tmp_path)).read(0) == "old"
+    assert load_snapshot("owner__repo", "bbb222", root=str(tmp_path)).read(0) == "new"
+    assert load_snapshot("owner__repo", root=str(tmp_path)).ref == "bbb222"
+    assert load_snapshot("owner__repo", "dev", root=str(tmp_path)) is None
@@ -0,0 +1,159 @@
+import os
+import asyncio
+import subprocess
+import httpx
+import pytest
+from app.fetcher import RawFetcher
+from app.sources import SourceError, GitHubSource, LocalGitSource, is_github_target, local_repo_key
+
+def test_subtree_without_ref_lists_default_branch_subtree():
+    source = GitHubSource("https://github.com/org/mono", prefix="services/billing")
+    assert source.list_url == "https://github.com/org/mono/tree/HEAD/services/billing"
+    assert source.ref is None and source.name == "mono_services_billing"
+
+def test_tree_url_sets_ref_and_prefix():
+    source = GitHubSource("https://github.com/org/mono/tree/main/services/billing")
+    assert (source.ref, source.prefix) == ("main", "services/billing")
+    assert source.list_url == "https://github.com/org/mono/tree/main/services/billing"
+
+def test_plain_repo_lists_root_page():
+    assert GitHubSource("https://github.com/org/mono").list_url == "https://github.com/org/mono"
+
+def test_only_urls_are_github_targets():
+    assert is_github_target("https://github.com/org/repo")
+    assert is_github_target("github.com/org/repo")
+    assert is_github_target("http://example.com/org/repo")
+    assert not is_github_target("/srv/mirrors/github.com/org/repo")
+    assert not is_github_target("mirrors/github.com/org/repo.git")
+
+def test_local_repo_key_matches_source_key():
+    path = "/srv/mirrors/github.com/org/repo.git"
+    assert local_repo_key(path) == LocalGitSource(path).key
+    assert local_repo_key(path).startswith("local__repo_")
+
+def test_same_named_local_repos_get_distinct_keys(tmp_path):
+    first, second = tmp_path / "a" / "repo", tmp_path / "b" / "repo"
+    first.mkdir(parents=True)
+    second.mkdir(parents=True)
+    (tmp_path / "link").symlink_to(first)
+    assert local_repo_key(str(first)) != local_repo_key(str(second))
+    assert local_repo_key(str(tmp_path / "link")) == local_repo_key(str(first))
+
+def test_github_targets_are_normalized():
+    source = GitHubSource("github.com/org/repo")
+    assert source.repo_url == "https://github.com/org/repo" and source.key == "org__repo"
+
+def test_other_hosts_are_rejected():
+    with pytest.raises(SourceError):
+        GitHubSource("http://example.com/org/repo")
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   check=True, capture_output=True)
+
+@pytest.fixture
+def local_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "README.md").write_text("# Demo\n")
+    (repo / "src" / "app.py").write_text("print('hi')\n")
+    (repo / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+    os.symlink("README.md", repo / "link.md")
+    git(repo, "init", "-q")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "initial")
+    return repo
+
+def test_local_list_files_skips_symlinks_and_scopes_to_prefix(local_repo):
+    async def main():
+        async with LocalGitSource(str(local_repo), workers=0) as source:
+            everything = await source.list_files()
+        async with LocalGitSource(str(local_repo), prefix="src", workers=0) as source:
+            return everything, await source.list_files()
+
+    (ref, paths), (_, scoped) = asyncio.run(main())
+    assert ref == "HEAD"
+    assert paths == ["README.md", "logo.png", "src/app.py"]
+    assert scoped == ["src/app.py"]
+
+def test_local_read_blob_returns_text_and_skips_binary(local_repo):
+    async def main():
+        async with LocalGitSource(str(local_repo), workers=2) as source:
+            _, paths = await source.list_files()
+            return await source.fetch_many(paths)
+
+    readme, logo, app = asyncio.run(main())
+    assert readme.success and readme.content == "# Demo\n"
+    assert app.success and app.content == "print('hi')\n"
+    assert not logo.success and logo.skipped
+
+def test_cancelled_read_retires_its_reader(local_repo):
+    async def main():
+        async with LocalGitSource(str(local_repo), workers=2) as source:
+            await source.list_files()
+            task = asyncio.create_task(source._read_blob("README.md"))
+            await asyncio.sleep(0)  # the read is now waiting on the reader's output
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            [retired] = [p for p in source._processes if p not in source._readers._queue]
+            await retired.wait()
+            # The surviving reader still serves reads in sync
+            result = await source._read_blob("src/app.py")
+            return source._readers.qsize(), retired.returncode, result
+
+    idle, returncode, result = asyncio.run(main())
+    assert idle == 1
+    assert returncode is not None
+    assert result.content == "print('hi')\n"
+
+def test_local_changes_from_raw_diff(local_repo):
+    (local_repo / "README.md").write_text("# Demo\nmore\n")
+    (local_repo / "src" / "new.py").write_text("x = 1\n")
+    git(local_repo, "mv", "src/app.py", "src/main.py")
+    git(local_repo, "rm", "-q", "logo.png")
+    os.symlink("src/main.py", local_repo / "main.lnk")
+    git(local_repo, "add", "-A")
+    git(local_repo, "commit", "-qm", "second")
+
+    async def main():
+        async with LocalGitSource(str(local_repo), workers=1) as source:
+            changeset = await source.list_changes("HEAD~1")
+            return changeset, await source.fetch_many(["src/main.py"])
+
+    changeset, [moved] = asyncio.run(main())
+    assert sorted((c.status, c.path) for c in changeset.changes) == [
+        ("A", "src/main.py"), ("A", "src/new.py"), ("D", "logo.png"), ("D", "src/app.py"), ("M", "README.md"),
+    ]
+    assert moved.content == "print('hi')\n"
+
+def test_large_compare_falls_back_to_tree_diff(monkeypatch):
+    monkeypatch.setattr("app.sources.COMPARE_MAX_FILES", 2)
+    trees = {
+        "base": [("README.md", "r1"), ("old.py", "o1"), ("same.py", "s1"), ("docs/x.md", "d1")],
+        "head": [("README.md", "r2"), ("new.py", "n1"), ("same.py", "s1"), ("docs/x.md", "d1")],
+    }
+
+    def handler(request):
+        path = request.url.path.removeprefix("/repos/org/repo/")
+        if path.startswith("commits/"):
+            return httpx.Response(200, text=path.split("/")[1])
+        if path.startswith("compare/"):
+            return httpx.Response(200, json={"files": [{"filename": "README.md", "status": "modified"}] * 2})
+        if path.startswith("git/trees/"):
+            entries = trees[path.split("/")[2]]
+            return httpx.Response(200, json={"tree": [{"path": p, "sha": s, "type": "blob"} for p, s in entries]})
+        return httpx.Response(404)
+
+    async def main():
+        async with RawFetcher() as fetcher:
+            fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with GitHubSource("https://github.com/org/repo", ref="head", fetcher=fetcher) as source:
+                changeset = await source.list_changes("base")
+            await fetcher.client.aclose()
+            return changeset
+
+    changeset = asyncio.run(main())
+    assert (changeset.base_commit, changeset.head_commit) == ("base", "head")
+    assert [(c.status, c.path) for c in changeset.changes] == [("D", "old.py"), ("M", "README.md"), ("A", "new.py")]
+    assert not changeset.patches
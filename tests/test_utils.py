@@ -0,0 +1,41 @@
+from app.config import MANIFEST_FILES, ENTRY_POINT_FILES
+import pytest
+from app.utils import is_useful_file, file_priority, parse_github_url, repo_key, github_to_raw_url
+
+def test_manifests_and_entry_points_are_fetched():
+    assert all(is_useful_file(f"svc/{name}") for name in MANIFEST_FILES | ENTRY_POINT_FILES)
+
+def test_lock_files_are_skipped():
+    for path in ("go.sum", "uv.lock", "web/package-lock.json", "node_modules/x/index.js"):
+        assert not is_useful_file(path)
+
+def test_file_priority_order():
+    paths = [
+        "vendor/lib/index.js", "tests/test_app.py", "src/pkg/deep/util.py", "src/core.py", "docs/guide.txt",
+        "CHANGELOG.md", "LICENSE.txt", "app.py", "CMakeLists.txt", "requirements.txt", "pyproject.toml", "README.md",
+    ]
+    assert sorted(paths, key=file_priority) == [
+        "README.md", "CMakeLists.txt", "pyproject.toml", "requirements.txt", "app.py", "CHANGELOG.md",
+        "docs/guide.txt", "LICENSE.txt", "src/core.py", "src/pkg/deep/util.py",
+        "tests/test_app.py", "vendor/lib/index.js",
+    ]
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://github.com/org/mono", ("https://github.com/org/mono", None, "")),
+    ("github.com/org/mono", ("https://github.com/org/mono", None, "")),
+    ("http://www.github.com/org/mono.git/", ("https://github.com/org/mono", None, "")),
+    ("https://github.com/org/mono/tree/main/services/billing", ("https://github.com/org/mono", "main", "services/billing")),
+    ("https://github.com/org/mono/blob/v1/src/app.py", ("https://github.com/org/mono", "v1", "src")),
+])
+def test_parse_github_url_normalizes(url, expected):
+    assert parse_github_url(url) == expected
+    assert repo_key(parse_github_url(url)[0]) == "org__mono"
+
+@pytest.mark.parametrize("url", ["https://gitlab.com/org/repo", "http://example.com/a/b", "https://github.com/org", "/srv/repo"])
+def test_parse_github_url_rejects_other_targets(url):
+    with pytest.raises(ValueError):
+        parse_github_url(url)
+
+def test_raw_urls_have_a_scheme():
+    repo_url = parse_github_url("github.com/org/mono")[0]
+    assert github_to_raw_url(repo_url, "main/a.py") == "https://raw.githubusercontent.com/org/mono/main/a.py"
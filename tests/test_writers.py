@@ -0,0 +1,49 @@
+import json
+import pytest
+from app.writers import open_writers
+
+def test_concurrent_writers_for_one_artifact_do_not_interleave(tmp_path):
+    first = open_writers("repo", ["txt", "jsonl"], "main", str(tmp_path))
+    second = open_writers("repo", ["txt", "jsonl"], "main", str(tmp_path))
+    for i in range(3):
+        for writer in first:
+            writer.add(f"a{i}.py", "first\n")
+        for writer in second:
+            writer.add(f"b{i}.py", "second\n")
+    for writer in first + second:
+        writer.close()
+    text = (tmp_path / "llm_context_repo.txt").read_text()
+    assert "first" not in text and text.count("second") == 3
+    records = [json.loads(line) for line in (tmp_path / "llm_context_repo.jsonl").read_text().splitlines()]
+    assert [r["path"] for r in records] == ["b0.py", "b1.py", "b2.py"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["llm_context_repo.jsonl", "llm_context_repo.txt"]
+
+def test_abort_keeps_the_previous_artifact(tmp_path):
+    good = open_writers("repo", ["txt"], "main", str(tmp_path))
+    good[0].add("a.py", "complete\n")
+    good[0].close()
+    aborted = open_writers("repo", ["txt"], "main", str(tmp_path))
+    aborted[0].add("b.py", "partial\n")
+    aborted[0].abort()
+    assert "complete" in (tmp_path / "llm_context_repo.txt").read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["llm_context_repo.txt"]
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_outputs_are_published_on_close(tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    writers = open_writers("repo", [fmt], "main", str(tmp_path))
+    writers[0].add("a.py", "print(1)\n")
+    assert not (tmp_path / f"llm_context_repo.{fmt}").exists()
+    writers[0].close()
+    path = str(tmp_path / f"llm_context_repo.{fmt}")
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column("path").to_pylist() == ["a.py"]
+
+def test_unknown_format_leaves_no_temp_files(tmp_path):
+    with pytest.raises(ValueError):
+        open_writers("repo", ["txt", "docx"], "main", str(tmp_path))
+    assert list(tmp_path.iterdir()) == []